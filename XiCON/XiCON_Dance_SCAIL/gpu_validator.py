@@ -4,102 +4,459 @@ GPU/CUDA validation module for XiCON Dance SCAIL ComfyUI deployment.
 Validates GPU availability before ComfyUI startup to prevent runtime failures.
 """
 
+import atexit
+import json
+import os
 import subprocess
 import sys
-import torch
-from typing import Tuple, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Tuple, Dict, Any, Optional
 
+try:
+    import pynvml
+except ImportError:  # nvidia-ml-py not installed; fall back to nvidia-smi
+    pynvml = None
 
-def validate_cuda(timeout_seconds: int = 10) -> Tuple[bool, str, Dict[str, Any]]:
+# Bytes per GiB
+_GIB = 1 << 30
+
+# NVML state, initialised once at import and reused by every call
+_NVML_HANDLES: list = []
+_NVML_ERROR: Optional[Exception] = None
+
+# CUDA/cuDNN versions, filled in once by _import_torch()
+_CUDA_VERSION: Optional[str] = None
+_CUDNN_VERSION: Any = None
+
+
+def _import_torch():
     """
-    Validates CUDA availability before ComfyUI startup.
+    Import torch on first use and cache its CUDA/cuDNN versions.
+
+    The versions are constant for the life of the process, and the first
+    cudnn.version() call loads libcudnn, so they are only read once.
+
+    Returns:
+        The torch module
+    """
+    global _CUDA_VERSION, _CUDNN_VERSION
+    import torch
+
+    if _CUDA_VERSION is None:
+        try:
+            _CUDA_VERSION = torch.version.cuda or "unknown"
+        except Exception as e:
+            _CUDA_VERSION = f"error: {str(e)}"
+        try:
+            cudnn = torch.backends.cudnn
+            _CUDNN_VERSION = cudnn.version() if cudnn.is_available() else None
+        except Exception as e:
+            _CUDNN_VERSION = f"error: {str(e)}"
+    return torch
+
+
+def _init_nvml():
+    """
+    Initialise NVML and fetch all device handles once per process.
+
+    Any NVML error is stored in _NVML_ERROR and re-raised by _probe_driver()
+    so validate_cuda() can report it; _probe_driver() retries the
+    initialisation first. NVML is shut down at interpreter exit.
+    """
+    global _NVML_HANDLES, _NVML_ERROR
+    if pynvml is None:
+        return
+    _NVML_ERROR = None
+    try:
+        pynvml.nvmlInit()
+    except pynvml.NVMLError as e:
+        _NVML_ERROR = e
+        return
+    atexit.register(pynvml.nvmlShutdown)
+    try:
+        _NVML_HANDLES = [
+            pynvml.nvmlDeviceGetHandleByIndex(i)
+            for i in range(pynvml.nvmlDeviceGetCount())
+        ]
+    except pynvml.NVMLError as e:
+        _NVML_ERROR = e
+
+
+_init_nvml()
+
+
+def _probe_driver() -> str:
+    """
+    Query the NVIDIA driver through NVML in-process.
+
+    Avoids the fork/exec and table rendering cost of spawning nvidia-smi.
+
+    Returns:
+        Driver version string reported by NVML
+
+    Raises:
+        pynvml.NVMLError: If the NVML library or the driver is unavailable
+    """
+    if _NVML_ERROR is not None:
+        # The failure may have been transient (e.g. driver still loading)
+        _init_nvml()
+        if _NVML_ERROR is not None:
+            raise _NVML_ERROR
+    return _decode(pynvml.nvmlSystemGetDriverVersion())
+
+
+def _decode(value) -> str:
+    """Return an NVML string as str; older pynvml releases return bytes."""
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _visible_devices() -> list:
+    """
+    Parse CUDA_VISIBLE_DEVICES into the devices visible to this process.
+
+    Returns:
+        Visible devices in CUDA order (cuda:0 first), each a physical NVML
+        index or a GPU-/MIG- UUID string
+    """
+    physical = len(_NVML_HANDLES)
+    mask = os.environ.get("CUDA_VISIBLE_DEVICES")
+    if mask is None:
+        return list(range(physical))
+
+    # Same rules as the CUDA runtime: parsing stops at the first invalid entry
+    devices = {}
+    for entry in mask.split(","):
+        entry = entry.strip()
+        if entry.startswith(("GPU-", "MIG-")):
+            devices[entry] = None
+            continue
+        try:
+            index = int(entry)
+        except ValueError:
+            break
+        if index < 0 or index >= physical:
+            break
+        devices[index] = None
+    return list(devices)
+
+
+def _compute_visible_device_count() -> int:
+    """
+    Count the CUDA devices visible to this process.
+
+    torch.cuda.device_count() memoizes its first result, so a
+    CUDA_VISIBLE_DEVICES mask set after torch initialised CUDA would be
+    ignored and the wrong count reported. This intersects the current mask
+    with the physical device count from NVML instead.
+
+    Returns:
+        Number of visible devices
+    """
+    return len(_visible_devices())
+
+
+def _visible_handles() -> list:
+    """
+    Map the devices visible to this process to their NVML handles.
+
+    Returns:
+        NVML handles in CUDA order; UUIDs NVML cannot resolve are skipped
+    """
+    handles = []
+    for device in _visible_devices():
+        if isinstance(device, int):
+            handles.append(_NVML_HANDLES[device])
+            continue
+        try:
+            handles.append(pynvml.nvmlDeviceGetHandleByUUID(device))
+        except pynvml.NVMLError:
+            pass
+    return handles
+
+
+def _check_nvidia_smi(details: Dict[str, Any], timeout_seconds: int) -> Optional[str]:
+    """
+    Run nvidia-smi and record what it reports into details.
 
     Args:
+        details: Details dict to update in place
         timeout_seconds: Maximum time to wait for nvidia-smi command
 
     Returns:
-        Tuple of (success: bool, message: str, details: dict)
-        - success: True if all validation checks pass
-        - message: Human-readable status message
-        - details: Dictionary containing diagnostic information
+        Error message on failure, None on success
     """
-    details = {}
-
-    # 1. Check NVIDIA driver via nvidia-smi
     try:
+        # Narrow CSV query instead of the full human-readable table
         result = subprocess.run(
-            ['nvidia-smi'],
-            capture_output=True,
+            ['nvidia-smi', '--query-gpu=driver_version,name',
+             '--format=csv,noheader,nounits'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
             timeout=timeout_seconds,
             text=True
         )
         details['nvidia_smi'] = 'available' if result.returncode == 0 else 'failed'
         if result.returncode != 0:
-            return False, f"nvidia-smi failed with code {result.returncode}", details
+            return f"nvidia-smi failed with code {result.returncode}"
+
+        rows = [line.split(',', 1) for line in result.stdout.splitlines() if line.strip()]
+        if rows:
+            details['driver_version'] = rows[0][0].strip()
+            details['device_names_smi'] = [row[1].strip() for row in rows if len(row) > 1]
     except subprocess.TimeoutExpired:
-        return False, f"nvidia-smi timed out after {timeout_seconds} seconds", details
+        return f"nvidia-smi timed out after {timeout_seconds} seconds - NVIDIA driver may be hung"
     except FileNotFoundError:
-        return False, "nvidia-smi not found - NVIDIA driver may not be installed", details
+        return "nvidia-smi not found - NVIDIA driver may not be installed"
     except Exception as e:
-        return False, f"nvidia-smi check failed: {str(e)}", details
+        return f"nvidia-smi check failed: {str(e)}"
+
+    return None
+
+
+@lru_cache(maxsize=1)
+def _validate_static(timeout_seconds: int) -> Tuple[bool, str, Dict[str, Any]]:
+    """
+    Run the checks whose outcome is fixed for the lifetime of the process.
+
+    Driver presence, device count/names and CUDA/cuDNN versions cannot change
+    while the process runs, so the result is computed once and reused.
+    validate_cuda() clears the cache after a failure, so only a passing
+    result is kept. Callers must copy the returned details before mutating them.
+
+    Args:
+        timeout_seconds: Maximum time to wait for nvidia-smi command
+
+    Returns:
+        Tuple of (success: bool, message: str, details: dict)
+    """
+    details = {}
+
+    # 1. Check NVIDIA driver via NVML
+    if pynvml is not None:
+        try:
+            details['driver_version'] = _probe_driver()
+        except pynvml.NVMLError_LibraryNotFound:
+            return False, "NVML library not found - NVIDIA driver may not be installed", details
+        except pynvml.NVMLError_DriverNotLoaded:
+            return False, "NVIDIA driver is not loaded", details
+        except pynvml.NVMLError as e:
+            return False, f"NVML driver check failed: {str(e)}", details
+
+    # Deferred past the NVML driver check: importing torch costs seconds
+    torch = _import_torch()
 
-    # 2. Check PyTorch CUDA availability
-    details['torch_cuda_available'] = torch.cuda.is_available()
-    if not torch.cuda.is_available():
+    # 2. Check PyTorch CUDA availability. A working CUDA runtime implies a
+    # loaded driver, so nvidia-smi only runs to explain a failure.
+    cuda_available = torch.cuda.is_available()
+    details['torch_cuda_available'] = cuda_available
+    if not cuda_available:
+        if pynvml is None:
+            error = _check_nvidia_smi(details, timeout_seconds)
+            if error:
+                return False, error, details
         return False, "PyTorch reports CUDA unavailable", details
+    if pynvml is None:
+        details['nvidia_smi'] = 'skipped'
 
-    # 3. Check CUDA device count
+    # 3-5. Device count/names and CUDA/cuDNN versions share one guarded
+    # section; progress records which step was running if it raises
+    progress = 'device_count'
     try:
-        device_count = torch.cuda.device_count()
+        if pynvml is not None:
+            device_count = _compute_visible_device_count()
+        else:
+            device_count = torch.cuda.device_count()
         details['device_count'] = device_count
         if device_count == 0:
             return False, "No CUDA devices found", details
 
-        # Get device names
-        device_names = [torch.cuda.get_device_name(i) for i in range(device_count)]
+        # Get device names. With NVML they come from the same visible-device
+        # mapping as the count, since torch's indices may be stale; the torch
+        # per-device queries overlap on multi-GPU hosts
+        progress = 'device_names'
+        if pynvml is not None:
+            device_names = [_decode(pynvml.nvmlDeviceGetName(handle)) for handle in _visible_handles()]
+        elif device_count == 1:
+            device_names = [torch.cuda.get_device_name(0)]
+        else:
+            with ThreadPoolExecutor(max_workers=min(device_count, 8)) as executor:
+                device_names = list(executor.map(torch.cuda.get_device_name, range(device_count)))
         details['device_names'] = device_names
-    except Exception as e:
-        return False, f"Failed to query CUDA devices: {str(e)}", details
 
-    # 4. Get VRAM information for primary device
-    try:
-        vram_free, vram_total = torch.cuda.mem_get_info(0)
-        details['vram_free_gb'] = round(vram_free / (1024**3), 2)
-        details['vram_total_gb'] = round(vram_total / (1024**3), 2)
-        details['vram_used_gb'] = round((vram_total - vram_free) / (1024**3), 2)
-
-        # Warn if less than 2GB free
-        if vram_free < 2 * (1024**3):
-            details['warning'] = f"Low VRAM available: {details['vram_free_gb']}GB free"
+        progress = 'cuda_version'
+        details['cuda_version'] = _CUDA_VERSION
+
+        progress = 'cudnn'
+        details['cudnn_version'] = _CUDNN_VERSION or "unknown"
+        details['cudnn_enabled'] = torch.backends.cudnn.enabled
     except Exception as e:
-        return False, f"Failed to get VRAM info: {str(e)}", details
+        return False, f"CUDA check failed at {progress}: {str(e)}", details
+
+    return True, "CUDA validation passed", details
+
 
-    # 5. Get CUDA version
+def _memory_info(handle):
+    """
+    Read a device's memory info, preferring the v2 NVML struct.
+
+    The v1 struct counts driver-reserved memory as free, which overstates
+    free VRAM on recent drivers and GPUs. v2 reports it separately; v1 is
+    only used where the driver or pynvml does not support v2.
+
+    Args:
+        handle: NVML device handle
+
+    Returns:
+        NVML memory info struct with free/total attributes
+    """
+    version = getattr(pynvml, 'nvmlMemory_v2', None)
+    if version is not None:
+        try:
+            return pynvml.nvmlDeviceGetMemoryInfo(handle, version=version)
+        except (TypeError, pynvml.NVMLError_FunctionNotFound, pynvml.NVMLError_NotSupported):
+            pass
+    return pynvml.nvmlDeviceGetMemoryInfo(handle)
+
+
+def _check_compute_mode(details: Dict[str, Any]) -> Optional[str]:
+    """
+    Record the primary device's compute mode and detect an exclusive owner.
+
+    The primary device is cuda:0, i.e. the first entry of
+    CUDA_VISIBLE_DEVICES, not necessarily physical GPU 0.
+
+    In EXCLUSIVE_PROCESS mode a second process cannot create a CUDA context,
+    so ComfyUI would fail shortly after validation "passed".
+
+    Args:
+        details: Details dict to update in place
+
+    Returns:
+        Error message if the device is held exclusively by another process,
+        None otherwise
+    """
+    if pynvml is None:
+        return None
+    handles = _visible_handles()
+    if not handles:
+        return None
+
+    handle = handles[0]
     try:
-        cuda_version = torch.version.cuda
-        details['cuda_version'] = cuda_version if cuda_version else "unknown"
-    except Exception as e:
-        details['cuda_version'] = f"error: {str(e)}"
+        mode = pynvml.nvmlDeviceGetComputeMode(handle)
+    except pynvml.NVMLError as e:
+        details['compute_mode'] = f"error: {str(e)}"
+        return None
+
+    if mode == pynvml.NVML_COMPUTEMODE_EXCLUSIVE_PROCESS:
+        details['compute_mode'] = 'exclusive_process'
+        try:
+            processes = pynvml.nvmlDeviceGetComputeRunningProcesses(handle)
+        except pynvml.NVMLError:
+            processes = []
+        others = [p.pid for p in processes if p.pid != os.getpid()]
+        if others:
+            return f"cuda:0 is in EXCLUSIVE_PROCESS mode and owned by PID {others[0]}"
+    elif mode == pynvml.NVML_COMPUTEMODE_PROHIBITED:
+        details['compute_mode'] = 'prohibited'
+        return "cuda:0 compute mode is PROHIBITED"
+    else:
+        details['compute_mode'] = 'default'
+
+    return None
 
-    # 6. Get cuDNN version if available
+
+def _poll_vram(details: Dict[str, Any]) -> Optional[str]:
+    """
+    Record current VRAM usage into details.
+
+    With NVML every device visible to this process is polled, since the
+    scheduler may place work on any of them; the low-VRAM warning is raised
+    on the emptiest one.
+
+    Args:
+        details: Details dict to update in place
+
+    Returns:
+        Error message on failure, None on success
+    """
     try:
-        cudnn_version = torch.backends.cudnn.version()
-        details['cudnn_version'] = cudnn_version if cudnn_version else "unknown"
-        details['cudnn_enabled'] = torch.backends.cudnn.enabled
+        handles = _visible_handles() if pynvml is not None else []
+        if handles:
+            # NVML reads VRAM without forcing a CUDA context into existence;
+            # the per-device queries are independent driver calls
+            if len(handles) > 1:
+                with ThreadPoolExecutor(max_workers=min(len(handles), 8)) as executor:
+                    infos = list(executor.map(_memory_info, handles))
+            else:
+                infos = [_memory_info(handles[0])]
+            memory = [(info.free, info.total) for info in infos]
+        else:
+            memory = [_import_torch().cuda.mem_get_info(0)]
+        vram_free, vram_total = memory[0]
+        details['vram_free_gb'] = round(vram_free / _GIB, 2)
+        details['vram_total_gb'] = round(vram_total / _GIB, 2)
+        details['vram_used_gb'] = round((vram_total - vram_free) / _GIB, 2)
+        details['vram_free_gb_per_device'] = [round(free / _GIB, 2) for free, _ in memory]
+
+        # Warn if any device has less than 2GB free
+        min_free = min(free for free, _ in memory)
+        if min_free < 2 * _GIB:
+            details['warning'] = f"Low VRAM available: {round(min_free / _GIB, 2)}GB free"
     except Exception as e:
-        details['cudnn_version'] = f"error: {str(e)}"
+        return f"Failed to get VRAM info: {str(e)}"
 
-    return True, "CUDA validation passed", details
+    return None
+
+
+def validate_cuda(timeout_seconds: int = 3) -> Tuple[bool, str, Dict[str, Any]]:
+    """
+    Validates CUDA availability before ComfyUI startup.
+
+    Passing static checks are cached per process; only compute mode and VRAM
+    usage are re-read on every call.
+
+    Args:
+        timeout_seconds: Maximum time to wait for nvidia-smi command. A
+            healthy nvidia-smi query finishes well under a second, so the
+            default only has to cover a slow cold start.
+
+    Returns:
+        Tuple of (success: bool, message: str, details: dict)
+        - success: True if all validation checks pass
+        - message: Human-readable status message
+        - details: Dictionary containing diagnostic information
+    """
+    success, message, static_details = _validate_static(timeout_seconds)
+    details = dict(static_details)
+    if not success:
+        # Don't pin a possibly transient failure for the life of the worker
+        _validate_static.cache_clear()
+        return False, message, details
+
+    error = _check_compute_mode(details) or _poll_vram(details)
+    if error:
+        return False, error, details
+
+    return True, message, details
 
 
 def main():
     """Main entry point for standalone execution."""
+    success, message, details = validate_cuda()
+
+    if not sys.stdout.isatty():
+        # One JSON document per run so log scrapers can parse it directly
+        sys.stdout.write(json.dumps(
+            {'status': success, 'message': message, 'details': details},
+            default=str
+        ) + "\n")
+        sys.exit(0 if success else 1)
+
     print("=" * 60)
     print("XiCON Dance SCAIL - GPU/CUDA Validation")
     print("=" * 60)
-
-    success, message, details = validate_cuda()
-
     print(f"\nStatus: {'✓ SUCCESS' if success else '✗ FAILURE'}")
     print(f"Message: {message}")
     print(f"\nDetailed Information:")
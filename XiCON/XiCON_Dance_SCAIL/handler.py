@@ -9,27 +9,48 @@ VHS_VideoCombine nodes.
 
 import runpod
 from runpod.serverless.utils import rp_upload
+import atexit
+import fastjsonschema
 import json
+import random
+import re
+import select
 import urllib.request
 import urllib.parse
 import time
 import os
 import requests
+from requests.adapters import HTTPAdapter
 import base64
+import hashlib
+import shutil
 from io import BytesIO
 import websocket
 import uuid
 import tempfile
 import socket
-import traceback
 import logging
+import mimetypes
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from functools import lru_cache
 from typing import Dict, Any, Optional, Tuple, List
 
+try:
+    import orjson
+except ImportError:  # orjson not installed; fall back to the stdlib codec
+    orjson = None
+
+try:
+    import pybase64 as _b64
+except ImportError:  # pybase64 not installed; fall back to the stdlib encoder
+    _b64 = base64
+
 # ---------------------------------------------------------------------------
 # Logging setup
 # ---------------------------------------------------------------------------
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+logger.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
 
 # ---------------------------------------------------------------------------
 # Constants
@@ -38,11 +59,28 @@ COMFY_API_AVAILABLE_INTERVAL_MS = 50
 COMFY_API_AVAILABLE_MAX_RETRIES = 500
 WEBSOCKET_RECONNECT_ATTEMPTS = int(os.environ.get("WEBSOCKET_RECONNECT_ATTEMPTS", 5))
 WEBSOCKET_RECONNECT_DELAY_S = int(os.environ.get("WEBSOCKET_RECONNECT_DELAY_S", 3))
+# Upper bound on waiting for one workflow, and how long a single websocket
+# receive may block before the deadline is re-checked
+MAX_WORKFLOW_SECONDS = int(os.environ.get("MAX_WORKFLOW_SECONDS", 3600))
+IDLE_TICK_S = 30
 
 if os.environ.get("WEBSOCKET_TRACE", "false").lower() == "true":
     websocket.enableTrace(True)
 
 COMFY_HOST = "127.0.0.1:8188"
+
+# One client id and websocket for the life of the worker; ComfyUI routes
+# progress by client id, and messages are filtered by prompt_id per job
+_CLIENT_ID = str(uuid.uuid4())
+_WS_URL = f"ws://{COMFY_HOST}/ws?clientId={_CLIENT_ID}"
+_WS: Optional[websocket.WebSocket] = None
+
+# ComfyUI serializes messages with json.dumps, so progress frames start with this
+_PROGRESS_PREFIX = '{"type": "progress"'
+
+# One keep-alive pool for every ComfyUI HTTP call; sized above the output pool
+_COMFY = requests.Session()
+_COMFY.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0))
 REFRESH_WORKER = os.environ.get("REFRESH_WORKER", "false").lower() == "true"
 
 # Workflow template path - mounted inside container
@@ -50,14 +88,104 @@ WORKFLOW_TEMPLATE_PATH = os.environ.get(
     "WORKFLOW_TEMPLATE_PATH",
     "/workflow_template.json"
 )
+# Re-read the template when its mtime changes (for development only)
+WORKFLOW_TEMPLATE_HOT_RELOAD = os.environ.get("WORKFLOW_TEMPLATE_HOT_RELOAD", "false").lower() == "true"
+
+# Raw template bytes, read once and re-parsed per job
+_WORKFLOW_TEMPLATE_BYTES: Optional[bytes] = None
+_WORKFLOW_TEMPLATE_MTIME: Optional[float] = None
+
+# Every placeholder transform_request_to_workflow() fills, as one alternation
+_PLACEHOLDER_RE = re.compile(
+    r"\{\{(?:reference_image_filename|dance_video_filename|prompt|width|height|steps|cfg|seed)\}\}"
+)
+
+# Placeholder locations per template, keyed by hash of the template bytes
+_PLACEHOLDER_PLANS: Dict[int, List[Tuple[Tuple, str]]] = {}
 
 # ComfyUI input directories
 COMFY_INPUT_DIR = "/comfyui/input"
 
+# Input downloads: connect timeout, and chunk size for streaming to disk
+DOWNLOAD_CONNECT_TIMEOUT_S = 10
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Cache of downloaded inputs, one directory per URL, hardlinked into COMFY_INPUT_DIR.
+# Oldest entries are evicted while the filesystem has less than the minimum
+# free, or the cache holds more than the maximum size.
+INPUT_CACHE_DIR = os.environ.get("INPUT_CACHE_DIR", "/tmp/xicon_cache")
+INPUT_CACHE_MIN_FREE_BYTES = int(os.environ.get("INPUT_CACHE_MIN_FREE_BYTES", 5 * (1 << 30)))
+INPUT_CACHE_MAX_BYTES = int(os.environ.get("INPUT_CACHE_MAX_BYTES", 20 * (1 << 30)))
+
+# Query parameters that mark a presigned URL (S3, GCS, Azure SAS, CloudFront).
+# These change on every request, so such URLs bypass the input cache.
+_SIGNED_URL_PARAMS = frozenset({
+    "x-amz-signature", "x-amz-credential", "x-goog-signature", "x-goog-credential",
+    "signature", "sig", "se", "expires", "key-pair-id",
+})
+
+# Shared HTTP session for input downloads, created on first use
+_DOWNLOAD_SESSION: Optional[requests.Session] = None
+
+# Worker-lifetime pool so the reference image and dance video download in parallel
+_DOWNLOAD_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="xicon-download")
+
+# Worker-lifetime pool for fetching/uploading outputs while the workflow still runs
+_OUTPUT_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="xicon-output")
+
+# ---------------------------------------------------------------------------
+# JSON helpers
+# ---------------------------------------------------------------------------
+
+def _json_loads(data):
+    """Parse JSON from str or bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
 # ---------------------------------------------------------------------------
 # Input Validation
 # ---------------------------------------------------------------------------
 
+# Numbers may also arrive as numeric strings; they are coerced after validation
+_NUMERIC = {"type": ["number", "string"]}
+
+_INPUT_SCHEMA = {
+    "type": "object",
+    "required": ["images", "videos", "prompt"],
+    "properties": {
+        "images": {
+            "type": "object",
+            "required": ["reference_image"],
+            "properties": {"reference_image": {"type": "string", "minLength": 1}},
+        },
+        # dance_video can be an empty string for image-only mode
+        "videos": {
+            "type": "object",
+            "properties": {"dance_video": {"type": "string", "default": ""}},
+        },
+        "prompt": {"type": "string", "minLength": 1},
+        "negative_prompt": {"type": "string", "default": ""},
+        "width": dict(_NUMERIC, default=512),
+        "height": dict(_NUMERIC, default=896),
+        "steps": dict(_NUMERIC, default=6),
+        "cfg": dict(_NUMERIC, default=1.0),
+        "seed": dict(_NUMERIC, default=-1),
+    },
+}
+
+# Compiled once; fills in defaults and raises JsonSchemaException on violation
+_VALIDATE_INPUT = fastjsonschema.compile(_INPUT_SCHEMA)
+
+
 def validate_input(job_input: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
     """
     Validates the XiCON custom input format.
@@ -87,38 +215,24 @@ def validate_input(job_input: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]],
     # Parse JSON string if needed
     if isinstance(job_input, str):
         try:
-            job_input = json.loads(job_input)
+            job_input = _json_loads(job_input)
         except json.JSONDecodeError:
             return None, "Invalid JSON format in input"
 
-    # Required: images with reference_image
-    images = job_input.get("images")
-    if not images:
-        return None, "Missing 'images' parameter"
-
-    reference_image = images.get("reference_image")
-    if not reference_image:
-        return None, "Missing 'reference_image' in images"
-
-    # Required: videos (dance_video can be empty string for image-only mode)
-    videos = job_input.get("videos")
-    if videos is None:
-        return None, "Missing 'videos' parameter"
-
-    dance_video = videos.get("dance_video", "")
-
-    # Required: prompt
-    prompt = job_input.get("prompt")
-    if not prompt:
-        return None, "Missing 'prompt' parameter"
-
-    # Optional parameters with defaults
-    negative_prompt = job_input.get("negative_prompt", "")
-    width = job_input.get("width", 512)
-    height = job_input.get("height", 896)
-    steps = job_input.get("steps", 6)
-    cfg = job_input.get("cfg", 1.0)
-    seed = job_input.get("seed", -1)
+    try:
+        job_input = _VALIDATE_INPUT(job_input)
+    except fastjsonschema.JsonSchemaException as e:
+        return None, f"Invalid input: {e.message}"
+
+    reference_image = job_input["images"]["reference_image"]
+    dance_video = job_input["videos"]["dance_video"]
+    prompt = job_input["prompt"]
+    negative_prompt = job_input["negative_prompt"]
+    width = job_input["width"]
+    height = job_input["height"]
+    steps = job_input["steps"]
+    cfg = job_input["cfg"]
+    seed = job_input["seed"]
 
     # Validate numeric types
     try:
@@ -131,12 +245,12 @@ def validate_input(job_input: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]],
         return None, f"Invalid numeric parameter: {e}"
 
     # Validate dimensions (must be divisible by 32 for the workflow)
-    if width % 32 != 0:
-        width = (width // 32) * 32
-        print(f"worker-xicon - Adjusted width to {width} (divisible by 32)")
-    if height % 32 != 0:
-        height = (height // 32) * 32
-        print(f"worker-xicon - Adjusted height to {height} (divisible by 32)")
+    if width & 31:
+        width = max(32, width & ~31)
+        logger.info("worker-xicon - Adjusted width to %s (divisible by 32)", width)
+    if height & 31:
+        height = max(32, height & ~31)
+        logger.info("worker-xicon - Adjusted height to %s (divisible by 32)", height)
 
     return {
         "reference_image_url": reference_image,
@@ -155,46 +269,254 @@ def validate_input(job_input: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]],
 # URL Download Functions
 # ---------------------------------------------------------------------------
 
-def download_file(url: str, target_path: str, file_type: str, timeout: int = 300) -> Tuple[bool, str]:
+def _get_download_session() -> requests.Session:
+    """
+    Return the worker-wide session used for input downloads.
+
+    Reusing one session keeps connections to the media hosts alive across
+    jobs, saving a TCP and TLS handshake per download.
+    """
+    global _DOWNLOAD_SESSION
+    if _DOWNLOAD_SESSION is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        atexit.register(session.close)
+        _DOWNLOAD_SESSION = session
+    return _DOWNLOAD_SESSION
+
+
+def download_file(url: str, target_path: str, file_type: str, timeout: int = 60) -> Tuple[bool, str]:
     """
-    Download a file from URL synchronously.
+    Download a file from URL synchronously, streaming it to disk.
+
+    The parent directory of target_path must already exist.
 
     Args:
         url: Source URL
         target_path: Local path to save file
         file_type: Type description for logging
-        timeout: Download timeout in seconds (default 300 for large videos)
+        timeout: Socket read timeout in seconds. Applies per read, so a
+            stalled connection fails while a long video download does not.
 
     Returns:
         tuple: (success, error_message)
     """
     try:
-        print(f"worker-xicon - Downloading {file_type} from {url}")
-        response = requests.get(url, timeout=timeout, stream=True)
-        response.raise_for_status()
+        logger.info("worker-xicon - Downloading %s from %s", file_type, url)
+        response = _get_download_session().get(
+            url, timeout=(DOWNLOAD_CONNECT_TIMEOUT_S, timeout), stream=True
+        )
+        with response:
+            response.raise_for_status()
+            _save_response(response, target_path, file_type)
+        return True, ""
+    except Exception as e:
+        return False, _download_error(e, url, file_type)
 
-        # Ensure parent directory exists
-        os.makedirs(os.path.dirname(target_path), exist_ok=True)
 
-        # Write content in chunks for large files
-        with open(target_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+def _save_response(response: requests.Response, target_path: str, file_type: str):
+    """Write a streamed response body to target_path in chunks as it arrives."""
+    total = 0
+    with open(target_path, 'wb') as f:
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            f.write(chunk)
+            total += len(chunk)
+    logger.info("worker-xicon - Downloaded %s: %s bytes -> %s", file_type, total, target_path)
 
-        file_size = os.path.getsize(target_path)
-        print(f"worker-xicon - Downloaded {file_type}: {file_size} bytes -> {target_path}")
-        return True, ""
-    except requests.Timeout:
-        return False, f"Timeout downloading {file_type} from {url}"
-    except requests.RequestException as e:
-        return False, f"Error downloading {file_type}: {e}"
+
+def _download_error(error: Exception, url: str, file_type: str) -> str:
+    """Describe a download failure for the job's error message."""
+    if isinstance(error, requests.Timeout):
+        return f"Timeout downloading {file_type} from {url}"
+    if isinstance(error, requests.RequestException):
+        return f"Error downloading {file_type}: {error}"
+    return f"Unexpected error downloading {file_type}: {error}"
+
+
+def _evict_input_cache():
+    """
+    Remove least recently used cache entries until the cache fits its limits.
+
+    Each entry is one URL's directory (validator plus data) and is removed
+    as a unit. Entries with a download in progress are skipped. Files still
+    hardlinked into a job's input directory free no disk space when removed,
+    so they do not count towards the free-space target.
+    """
+    try:
+        entries = []  # (last used, cached bytes, bytes freed by removal, path)
+        for entry in os.scandir(INPUT_CACHE_DIR):
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            files = [f for f in os.scandir(entry.path) if f.is_file(follow_symlinks=False)]
+            if any(f.name.endswith(".part") for f in files):
+                continue
+            stats = [f.stat(follow_symlinks=False) for f in files]
+            entries.append((
+                max((st.st_mtime for st in stats), default=0.0),
+                sum(st.st_size for st in stats),
+                sum(st.st_size for st in stats if st.st_nlink == 1),
+                entry.path,
+            ))
+        entries.sort()
+
+        cache_size = sum(size for _, size, _, _ in entries)
+        stat = os.statvfs(INPUT_CACHE_DIR)
+        free = stat.f_bavail * stat.f_frsize
+        for _, size, freed, path in entries:
+            if free >= INPUT_CACHE_MIN_FREE_BYTES and cache_size <= INPUT_CACHE_MAX_BYTES:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            free += freed
+            cache_size -= size
+    except OSError as e:
+        logger.warning("worker-xicon - Input cache eviction failed: %s", e)
+
+
+def _link_or_copy(src: str, dst: str):
+    """Hardlink src to dst, copying instead when they are on different filesystems."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def _is_signed_url(url: str) -> bool:
+    """Check if a URL carries a query-string signature (e.g. an S3 presigned URL)."""
+    query = urllib.parse.urlsplit(url).query
+    return bool(query) and any(
+        name.lower() in _SIGNED_URL_PARAMS
+        for name, _ in urllib.parse.parse_qsl(query, keep_blank_values=True)
+    )
+
+
+def _read_validator(validator_path: str) -> Optional[Tuple[str, str]]:
+    """Read a cached (conditional header, value) pair, or None if there is none."""
+    try:
+        with open(validator_path, encoding="utf-8") as f:
+            header, _, value = f.read().partition("\n")
+    except OSError:
+        return None
+    return (header, value) if header and value else None
+
+
+def _write_validator(validator_path: str, header: str, value: str):
+    """Atomically record the conditional header to send for a cached URL."""
+    tmp_path = f"{validator_path}.{uuid.uuid4().hex}.part"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(f"{header}\n{value}")
+    os.replace(tmp_path, validator_path)
+
+
+def cached_download(url: str, target_path: str, file_type: str, timeout: int = 60) -> Tuple[bool, str]:
+    """
+    Download a file through the content-addressed input cache.
+
+    Each URL has a cache directory holding the file and the ETag (or
+    Last-Modified) the server sent with it. A repeat download is a
+    conditional GET; on 304 the cached file is hardlinked to target_path, so
+    cleanup_input_files() can still unlink it freely. Presigned URLs and
+    responses without a validator bypass the cache, and no download costs
+    more than the one GET.
+
+    Args:
+        url: Source URL
+        target_path: Local path to save file
+        file_type: Type description for logging
+        timeout: Socket read timeout in seconds
+
+    Returns:
+        tuple: (success, error_message)
+    """
+    if _is_signed_url(url):
+        # Presigned URLs differ on every request, so they would never hit
+        return download_file(url, target_path, file_type, timeout)
+
+    entry_dir = os.path.join(INPUT_CACHE_DIR, hashlib.sha256(url.encode("utf-8")).hexdigest())
+    ext = os.path.splitext(target_path)[1]
+    validator_path = os.path.join(entry_dir, "validator")
+
+    def cache_path(value: str) -> str:
+        return os.path.join(entry_dir, hashlib.sha256(value.encode("utf-8")).hexdigest() + ext)
+
+    headers = {}
+    cached = _read_validator(validator_path)
+    if cached is not None and os.path.exists(cache_path(cached[1])):
+        headers[cached[0]] = cached[1]
+
+    try:
+        logger.info("worker-xicon - Downloading %s from %s", file_type, url)
+        response = _get_download_session().get(
+            url, headers=headers, timeout=(DOWNLOAD_CONNECT_TIMEOUT_S, timeout), stream=True
+        )
+        with response:
+            if response.status_code == 304 and headers:
+                cached_path = cache_path(cached[1])
+                try:
+                    _link_or_copy(cached_path, target_path)
+                    os.utime(cached_path)
+                    os.utime(validator_path)
+                except OSError as e:
+                    logger.warning("worker-xicon - Input cache hit unusable for %s: %s", file_type, e)
+                    return download_file(url, target_path, file_type, timeout)
+                logger.info("worker-xicon - Using cached %s -> %s", file_type, target_path)
+                _evict_input_cache()
+                return True, ""
+
+            response.raise_for_status()
+            if response.headers.get("ETag"):
+                validator = ("If-None-Match", response.headers["ETag"])
+            elif response.headers.get("Last-Modified"):
+                validator = ("If-Modified-Since", response.headers["Last-Modified"])
+            else:
+                _save_response(response, target_path, file_type)
+                return True, ""
+
+            # Download beside the entries, where eviction never looks, and
+            # move the finished file into the entry directory
+            os.makedirs(INPUT_CACHE_DIR, exist_ok=True)
+            part_path = os.path.join(INPUT_CACHE_DIR, f"{uuid.uuid4().hex}.part")
+            cached_path = cache_path(validator[1])
+            try:
+                _save_response(response, part_path, file_type)
+                os.makedirs(entry_dir, exist_ok=True)
+                os.replace(part_path, cached_path)
+            except BaseException:
+                try:
+                    os.unlink(part_path)
+                except FileNotFoundError:
+                    pass
+                raise
     except Exception as e:
-        return False, f"Unexpected error downloading {file_type}: {e}"
+        return False, _download_error(e, url, file_type)
+
+    try:
+        # Data first, then the validator naming it, so a concurrent reader
+        # never sends a validator whose content is not cached yet
+        _write_validator(validator_path, *validator)
+        _link_or_copy(cached_path, target_path)
+    except OSError as e:
+        return False, f"Error caching {file_type}: {e}"
+
+    # Drop data cached under an earlier validator
+    for entry in os.scandir(entry_dir):
+        if entry.path not in (cached_path, validator_path) and not entry.name.endswith(".part"):
+            try:
+                os.unlink(entry.path)
+            except OSError:
+                pass
+
+    _evict_input_cache()
+    return True, ""
 
 
 def download_inputs(validated_data: Dict[str, Any], job_id: str) -> Tuple[Dict[str, str], Optional[str]]:
     """
-    Download all input images and videos synchronously.
+    Download all input images and videos.
+
+    The reference image and dance video are fetched concurrently on the
+    worker-lifetime download pool.
 
     Args:
         validated_data: Validated input data containing URLs
@@ -203,34 +525,33 @@ def download_inputs(validated_data: Dict[str, Any], job_id: str) -> Tuple[Dict[s
     Returns:
         tuple: (filenames_dict, error_message)
     """
-    filenames = {}
+    os.makedirs(COMFY_INPUT_DIR, exist_ok=True)
 
     # Reference image (required)
     ref_url = validated_data["reference_image_url"]
     ref_ext = os.path.splitext(urllib.parse.urlparse(ref_url).path)[1] or ".png"
     ref_filename = f"ref_{job_id}{ref_ext}"
     ref_path = os.path.join(COMFY_INPUT_DIR, ref_filename)
-
-    success, error = download_file(ref_url, ref_path, "reference_image")
-    if not success:
-        return {}, error
-    filenames["reference_image"] = ref_filename
+    ref_future = _DOWNLOAD_POOL.submit(cached_download, ref_url, ref_path, "reference_image")
 
     # Dance video (optional)
     video_url = validated_data.get("dance_video_url", "")
+    video_filename = ""
+    video_future = None
     if video_url:
         video_ext = os.path.splitext(urllib.parse.urlparse(video_url).path)[1] or ".mp4"
         video_filename = f"dance_{job_id}{video_ext}"
         video_path = os.path.join(COMFY_INPUT_DIR, video_filename)
+        video_future = _DOWNLOAD_POOL.submit(cached_download, video_url, video_path, "dance_video")
 
-        success, error = download_file(video_url, video_path, "dance_video", timeout=600)
-        if not success:
-            # Clean up the already downloaded reference image
-            cleanup_input_files({"reference_image": ref_filename})
-            return {}, error
-        filenames["dance_video"] = video_filename
-    else:
-        filenames["dance_video"] = ""
+    filenames = {"reference_image": ref_filename, "dance_video": video_filename}
+    ref_ok, ref_error = ref_future.result()
+    video_ok, video_error = video_future.result() if video_future else (True, "")
+
+    if not (ref_ok and video_ok):
+        # Clean up whatever did download (or was partially written)
+        cleanup_input_files(filenames)
+        return {}, ref_error or video_error
 
     return filenames, None
 
@@ -241,15 +562,29 @@ def download_inputs(validated_data: Dict[str, Any], job_id: str) -> Tuple[Dict[s
 
 def load_workflow_template() -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
     """
-    Load the workflow template from disk.
+    Load the workflow template.
+
+    The file is read once per worker; each call parses the cached bytes into
+    a fresh dict, so callers may mutate the result freely.
 
     Returns:
         tuple: (workflow_dict, error_message)
     """
+    global _WORKFLOW_TEMPLATE_BYTES, _WORKFLOW_TEMPLATE_MTIME
     try:
-        with open(WORKFLOW_TEMPLATE_PATH, 'r') as f:
-            workflow = json.load(f)
-        print(f"worker-xicon - Loaded workflow template from {WORKFLOW_TEMPLATE_PATH}")
+        if WORKFLOW_TEMPLATE_HOT_RELOAD and _WORKFLOW_TEMPLATE_BYTES is not None:
+            if os.path.getmtime(WORKFLOW_TEMPLATE_PATH) != _WORKFLOW_TEMPLATE_MTIME:
+                _WORKFLOW_TEMPLATE_BYTES = None
+
+        if _WORKFLOW_TEMPLATE_BYTES is None:
+            with open(WORKFLOW_TEMPLATE_PATH, 'rb') as f:
+                _WORKFLOW_TEMPLATE_MTIME = os.fstat(f.fileno()).st_mtime
+                template_bytes = f.read()
+            workflow = _json_loads(template_bytes)
+            _WORKFLOW_TEMPLATE_BYTES = template_bytes
+            logger.info("worker-xicon - Loaded workflow template from %s", WORKFLOW_TEMPLATE_PATH)
+        else:
+            workflow = _json_loads(_WORKFLOW_TEMPLATE_BYTES)
         return workflow, None
     except FileNotFoundError:
         return None, f"Workflow template not found at {WORKFLOW_TEMPLATE_PATH}"
@@ -259,6 +594,92 @@ def load_workflow_template() -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
         return None, f"Failed to load workflow template: {e}"
 
 
+def _replace_placeholders(node: Any, replacements: Dict[str, Any], pattern: "re.Pattern") -> Any:
+    """
+    Recursively replace placeholders in string leaves of a workflow, in place.
+
+    A leaf that is exactly one placeholder takes the value with its own type
+    (so numeric inputs become real ints/floats); placeholders embedded in
+    longer strings are substituted as text.
+
+    Args:
+        node: Workflow dict, list or leaf value
+        replacements: Placeholder -> value mapping
+        pattern: Compiled alternation of all placeholders
+
+    Returns:
+        The node with placeholders replaced (containers are mutated in place)
+    """
+    if isinstance(node, dict):
+        for key, value in node.items():
+            node[key] = _replace_placeholders(value, replacements, pattern)
+    elif isinstance(node, list):
+        for i, value in enumerate(node):
+            node[i] = _replace_placeholders(value, replacements, pattern)
+    elif isinstance(node, str):
+        if node in replacements:
+            return replacements[node]
+        if "{{" in node:
+            return pattern.sub(lambda m: str(replacements[m.group(0)]), node)
+    return node
+
+
+def _build_placeholder_plan(node: Any, pattern: "re.Pattern",
+                            path: Tuple = ()) -> List[Tuple[Tuple, str]]:
+    """
+    Record where placeholders occur in a workflow template.
+
+    Args:
+        node: Workflow dict, list or leaf value
+        pattern: Compiled alternation of all placeholders
+        path: Keys/indices leading to node
+
+    Returns:
+        list of (path, original_string) for every string leaf with a placeholder
+    """
+    plan = []
+    if isinstance(node, dict):
+        for key, value in node.items():
+            plan.extend(_build_placeholder_plan(value, pattern, path + (key,)))
+    elif isinstance(node, list):
+        for i, value in enumerate(node):
+            plan.extend(_build_placeholder_plan(value, pattern, path + (i,)))
+    elif isinstance(node, str) and pattern.search(node):
+        plan.append((path, node))
+    return plan
+
+
+def _apply_placeholder_plan(workflow: Dict[str, Any], plan: List[Tuple[Tuple, str]],
+                            replacements: Dict[str, Any], pattern: "re.Pattern") -> bool:
+    """
+    Fill placeholders at the recorded paths, in place.
+
+    Every path is checked before anything is written, so a workflow that
+    does not match the plan is left untouched.
+
+    Returns:
+        True if the plan was applied, False if the workflow did not match it
+    """
+    targets = []
+    try:
+        for path, original in plan:
+            parent = workflow
+            for key in path[:-1]:
+                parent = parent[key]
+            if parent[path[-1]] != original:
+                return False
+            targets.append((parent, path[-1], original))
+    except (KeyError, IndexError, TypeError):
+        return False
+
+    for parent, key, original in targets:
+        if original in replacements:
+            parent[key] = replacements[original]
+        else:
+            parent[key] = pattern.sub(lambda m: str(replacements[m.group(0)]), original)
+    return True
+
+
 def transform_request_to_workflow(validated_data: Dict[str, Any],
                                    filenames: Dict[str, str],
                                    workflow: Dict[str, Any]) -> Dict[str, Any]:
@@ -275,35 +696,36 @@ def transform_request_to_workflow(validated_data: Dict[str, Any],
     Args:
         validated_data: Validated input parameters
         filenames: Downloaded file names
-        workflow: Workflow template dict
+        workflow: Workflow template dict, modified in place
 
     Returns:
         Modified workflow dict with placeholders replaced
     """
-    # Convert workflow to string for placeholder replacement
-    workflow_str = json.dumps(workflow)
-
-    # Replace placeholders
     replacements = {
         "{{reference_image_filename}}": filenames.get("reference_image", ""),
         "{{dance_video_filename}}": filenames.get("dance_video", ""),
         "{{prompt}}": validated_data["prompt"],
-        "{{width}}": str(validated_data["width"]),
-        "{{height}}": str(validated_data["height"]),
-        "{{steps}}": str(validated_data["steps"]),
-        "{{cfg}}": str(validated_data["cfg"]),
-        "{{seed}}": str(validated_data["seed"]),
+        "{{width}}": validated_data["width"],
+        "{{height}}": validated_data["height"],
+        "{{steps}}": validated_data["steps"],
+        "{{cfg}}": validated_data["cfg"],
+        "{{seed}}": validated_data["seed"],
     }
+    pattern = _PLACEHOLDER_RE
 
-    for placeholder, value in replacements.items():
-        # Escape special JSON characters in values
-        if placeholder in ["{{prompt}}"]:
-            # For text fields, escape quotes and backslashes
-            value = value.replace("\\", "\\\\").replace('"', '\\"')
-        workflow_str = workflow_str.replace(placeholder, value)
+    # The template is fixed per worker, so placeholder locations are found
+    # once and later jobs only assign at those paths
+    plan = None
+    if _WORKFLOW_TEMPLATE_BYTES is not None:
+        template_key = hash(_WORKFLOW_TEMPLATE_BYTES)
+        plan = _PLACEHOLDER_PLANS.get(template_key)
+        if plan is None:
+            plan = _PLACEHOLDER_PLANS[template_key] = _build_placeholder_plan(workflow, pattern)
 
-    # Parse back to dict
-    return json.loads(workflow_str)
+    # Values are plain Python objects, so no JSON escaping is needed
+    if plan is not None and _apply_placeholder_plan(workflow, plan, replacements, pattern):
+        return workflow
+    return _replace_placeholders(workflow, replacements, pattern)
 
 
 # ---------------------------------------------------------------------------
@@ -313,26 +735,39 @@ def transform_request_to_workflow(validated_data: Dict[str, Any],
 def check_server(url: str, retries: int = 500, delay: int = 50) -> bool:
     """
     Check if ComfyUI server is reachable.
-    """
-    print(f"worker-xicon - Checking API server at {url}...")
-    for i in range(retries):
-        try:
-            response = requests.get(url, timeout=5)
-            if response.status_code == 200:
-                print(f"worker-xicon - API is reachable")
-                return True
-        except (requests.Timeout, requests.RequestException):
-            pass
-        time.sleep(delay / 1000)
 
-    print(f"worker-xicon - Failed to connect to server at {url} after {retries} attempts.")
+    Waits for the port to accept a TCP connection, backing off
+    exponentially with jitter, and only then issues a single HTTP GET.
+    The overall budget is retries * delay milliseconds, as before.
+    """
+    logger.info("worker-xicon - Checking API server at %s...", url)
+    parsed = urllib.parse.urlparse(url)
+    address = (parsed.hostname, parsed.port or 80)
+    deadline = time.monotonic() + retries * delay / 1000
+    backoff = 0.02
+
+    while time.monotonic() < deadline:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+            probe.settimeout(0.2)
+            port_open = probe.connect_ex(address) == 0
+        if port_open:
+            try:
+                if _COMFY.get(url, timeout=2).status_code == 200:
+                    logger.info("worker-xicon - API is reachable")
+                    return True
+            except requests.RequestException:
+                pass
+        time.sleep(backoff + random.random() * backoff * 0.3)
+        backoff = min(backoff * 2, 1.0)
+
+    logger.warning("worker-xicon - Failed to connect to server at %s within %.0fs.", url, retries * delay / 1000)
     return False
 
 
 def _comfy_server_status() -> Dict[str, Any]:
     """Return reachability info for the ComfyUI HTTP server."""
     try:
-        resp = requests.get(f"http://{COMFY_HOST}/", timeout=5)
+        resp = _COMFY.get(f"http://{COMFY_HOST}/", timeout=1.5)
         return {"reachable": resp.status_code == 200, "status_code": resp.status_code}
     except Exception as exc:
         return {"reachable": False, "error": str(exc)}
@@ -343,15 +778,15 @@ def queue_workflow(workflow: Dict[str, Any], client_id: str) -> Dict[str, Any]:
     Queue a workflow to ComfyUI for processing.
     """
     payload = {"prompt": workflow, "client_id": client_id}
-    data = json.dumps(payload).encode("utf-8")
+    data = _json_dumps(payload)
 
     headers = {"Content-Type": "application/json"}
-    response = requests.post(
+    response = _COMFY.post(
         f"http://{COMFY_HOST}/prompt", data=data, headers=headers, timeout=30
     )
 
     if response.status_code == 400:
-        print(f"worker-xicon - ComfyUI returned 400. Response body: {response.text}")
+        logger.warning("worker-xicon - ComfyUI returned 400. Response body: %s", response.text)
         try:
             error_data = response.json()
             error_message = "Workflow validation failed"
@@ -379,72 +814,249 @@ def queue_workflow(workflow: Dict[str, Any], client_id: str) -> Dict[str, Any]:
             raise ValueError(f"ComfyUI validation failed: {response.text}")
 
     response.raise_for_status()
-    return response.json()
+    return _json_loads(response.content)
+
+
+def cancel_prompt(prompt_id: str):
+    """
+    Stop a prompt the job is abandoning, so it does not hold up the next job.
+
+    Removes the prompt from the pending queue and interrupts it if it is
+    already running. Best effort: failures are logged, not raised.
+    """
+    headers = {"Content-Type": "application/json"}
+    for path, payload in (("queue", {"delete": [prompt_id]}), ("interrupt", {"prompt_id": prompt_id})):
+        try:
+            response = _COMFY.post(
+                f"http://{COMFY_HOST}/{path}", data=_json_dumps(payload), headers=headers, timeout=10
+            )
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.warning("worker-xicon - Failed to cancel prompt %s via /%s: %s", prompt_id, path, e)
 
 
 def get_history(prompt_id: str) -> Dict[str, Any]:
     """Retrieve the history of a prompt."""
-    response = requests.get(f"http://{COMFY_HOST}/history/{prompt_id}", timeout=30)
+    response = _COMFY.get(f"http://{COMFY_HOST}/history/{prompt_id}", timeout=30)
     response.raise_for_status()
-    return response.json()
+    return _json_loads(response.content)
 
 
-def get_file_data(filename: str, subfolder: str, file_type: str) -> Optional[bytes]:
+def stream_view_to_path(filename: str, subfolder: str, file_type: str, dst_path: str) -> bool:
     """
-    Fetch file bytes from the ComfyUI /view endpoint.
-    Works for both images and videos.
+    Stream a file from the ComfyUI /view endpoint straight to dst_path.
+    Works for both images and videos, without holding the body in memory.
+
+    Returns:
+        True on success, False on error
     """
-    print(f"worker-xicon - Fetching file data: type={file_type}, subfolder={subfolder}, filename={filename}")
+    logger.debug("worker-xicon - Fetching file data: type=%s, subfolder=%s, filename=%s", file_type, subfolder, filename)
     data = {"filename": filename, "subfolder": subfolder, "type": file_type}
     url_values = urllib.parse.urlencode(data)
     try:
-        response = requests.get(f"http://{COMFY_HOST}/view?{url_values}", timeout=120)
-        response.raise_for_status()
-        print(f"worker-xicon - Successfully fetched file data for {filename}")
-        return response.content
+        with _COMFY.get(f"http://{COMFY_HOST}/view?{url_values}", stream=True, timeout=120) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            with open(dst_path, 'wb') as f:
+                shutil.copyfileobj(response.raw, f, 1 << 16)
+        logger.debug("worker-xicon - Successfully fetched file data for %s", filename)
+        return True
     except requests.Timeout:
-        print(f"worker-xicon - Timeout fetching file data for {filename}")
-        return None
-    except requests.RequestException as e:
-        print(f"worker-xicon - Error fetching file data for {filename}: {e}")
+        logger.warning("worker-xicon - Timeout fetching file data for %s", filename)
+        return False
+    except (requests.RequestException, OSError) as e:
+        logger.warning("worker-xicon - Error fetching file data for %s: %s", filename, e)
+        return False
+
+
+@lru_cache(maxsize=1)
+def _s3_client():
+    """
+    Return rp_upload's boto3 client and transfer config, built once.
+
+    The client is None when boto3 or the bucket credentials are missing.
+    """
+    return rp_upload.get_boto_client()
+
+
+def _upload_view_to_s3(filename: str, subfolder: str, file_type: str, job_id: str) -> Optional[str]:
+    """
+    Stream a /view response body straight into S3, without a temp file.
+
+    Args:
+        filename: ComfyUI output filename
+        subfolder: ComfyUI output subfolder
+        file_type: ComfyUI output type
+        job_id: Job ID used as the key prefix
+
+    Returns:
+        Presigned URL of the uploaded object, or None if no boto3 client is
+        available (callers then fall back to the rp_upload temp-file path)
+
+    Raises:
+        Exception: On fetch or upload failure
+    """
+    client, transfer_config = _s3_client()
+    if client is None:
         return None
 
+    bucket = time.strftime("%m-%y")
+    key = f"{job_id}/{filename}"
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    data = {"filename": filename, "subfolder": subfolder, "type": file_type}
+    url_values = urllib.parse.urlencode(data)
+
+    with _COMFY.get(f"http://{COMFY_HOST}/view?{url_values}", stream=True, timeout=120) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        client.upload_fileobj(response.raw, bucket, key,
+                              ExtraArgs={"ContentType": content_type}, Config=transfer_config)
+
+    return client.generate_presigned_url(
+        "get_object", Params={"Bucket": bucket, "Key": key}, ExpiresIn=604800
+    )
+
+
+def _base64_file(path: str) -> str:
+    """
+    Base64-encode a file in fixed-size chunks.
+
+    57 KiB is a multiple of 3, so chunk encodings concatenate without padding.
+    Uses SIMD pybase64 when installed. Runs on the output pool, so encoding
+    one output overlaps with fetching the next.
+    """
+    parts = []
+    with open(path, 'rb') as f:
+        while chunk := f.read(57 * 1024):
+            parts.append(_b64.b64encode(chunk).decode("ascii"))
+    return "".join(parts)
+
 
 def _attempt_websocket_reconnect(ws_url: str, max_attempts: int,
                                   delay_s: int, initial_error: Exception) -> websocket.WebSocket:
     """
     Attempt to reconnect to WebSocket after disconnect.
+
+    The first attempt is immediate; later ones back off exponentially from
+    delay_s (capped at 30 s) with jitter.
     """
-    print(f"worker-xicon - Websocket connection closed unexpectedly: {initial_error}. Attempting to reconnect...")
+    logger.warning("worker-xicon - Websocket connection closed unexpectedly: %s. Attempting to reconnect...", initial_error)
     last_error = initial_error
 
     for attempt in range(max_attempts):
         srv_status = _comfy_server_status()
         if not srv_status["reachable"]:
-            print(f"worker-xicon - ComfyUI HTTP unreachable – aborting websocket reconnect")
+            logger.warning("worker-xicon - ComfyUI HTTP unreachable – aborting websocket reconnect")
             raise websocket.WebSocketConnectionClosedException(
                 "ComfyUI HTTP unreachable during websocket reconnect"
             )
 
-        print(f"worker-xicon - Reconnect attempt {attempt + 1}/{max_attempts}...")
+        logger.info("worker-xicon - Reconnect attempt %s/%s...", attempt + 1, max_attempts)
         try:
             new_ws = websocket.WebSocket()
             new_ws.connect(ws_url, timeout=10)
-            print(f"worker-xicon - Websocket reconnected successfully.")
+            logger.info("worker-xicon - Websocket reconnected successfully.")
             return new_ws
         except (websocket.WebSocketException, ConnectionRefusedError,
                 socket.timeout, OSError) as e:
             last_error = e
-            print(f"worker-xicon - Reconnect attempt {attempt + 1} failed: {e}")
+            logger.warning("worker-xicon - Reconnect attempt %s failed: %s", attempt + 1, e)
             if attempt < max_attempts - 1:
-                print(f"worker-xicon - Waiting {delay_s} seconds before next attempt...")
-                time.sleep(delay_s)
+                # Exponential backoff with jitter so workers do not retry in lockstep
+                wait_s = min(30, delay_s * (2 ** attempt)) * (0.5 + random.random() * 0.5)
+                logger.info("worker-xicon - Waiting %.1f seconds before next attempt...", wait_s)
+                time.sleep(wait_s)
 
     raise websocket.WebSocketConnectionClosedException(
         f"Connection closed and failed to reconnect. Last error: {last_error}"
     )
 
 
+def _recv_coalesced(ws: websocket.WebSocket) -> List[str]:
+    """
+    Receive one websocket frame plus any frames already queued behind it.
+
+    Binary frames (previews) are dropped. Of the queued progress frames only
+    the newest is kept, since each one supersedes the previous; every other
+    message is returned in arrival order.
+
+    Args:
+        ws: Connected websocket
+
+    Returns:
+        list of text frames to process
+
+    Raises:
+        WebSocketException: If the first frame cannot be received
+    """
+    frames = [ws.recv()]
+    sock = ws.sock
+    while sock is not None and select.select([sock], [], [], 0)[0]:
+        try:
+            frames.append(ws.recv())
+        except (websocket.WebSocketException, OSError):
+            # Keep what was already read; a closed socket surfaces on the next recv()
+            break
+
+    texts = [frame for frame in frames if isinstance(frame, str)]
+    last_progress = None
+    for i, frame in enumerate(texts):
+        if frame.startswith(_PROGRESS_PREFIX):
+            last_progress = i
+    return [frame for i, frame in enumerate(texts)
+            if i == last_progress or not frame.startswith(_PROGRESS_PREFIX)]
+
+
+def _close_ws():
+    """Close the worker websocket, if open."""
+    global _WS
+    if _WS is not None:
+        try:
+            if _WS.connected:
+                logger.info("worker-xicon - Closing websocket connection")
+                _WS.close()
+        except (websocket.WebSocketException, OSError):
+            pass
+        _WS = None
+
+
+atexit.register(_close_ws)
+
+
+def _get_ws() -> websocket.WebSocket:
+    """
+    Return the worker websocket, connecting or replacing a stale one.
+
+    Returns:
+        Connected websocket for _CLIENT_ID
+    """
+    global _WS
+    if _WS is not None and _WS.connected:
+        try:
+            _WS.ping()
+            return _WS
+        except (websocket.WebSocketException, OSError):
+            _close_ws()
+
+    logger.info("worker-xicon - Connecting to websocket: %s", _WS_URL)
+    ws = websocket.WebSocket()
+    ws.connect(_WS_URL, timeout=10)
+    logger.info("worker-xicon - Websocket connected")
+    _WS = ws
+    return _WS
+
+
+def _reconnect_ws(initial_error: Exception) -> websocket.WebSocket:
+    """Replace the worker websocket after an unexpected disconnect."""
+    global _WS
+    _close_ws()
+    _WS = _attempt_websocket_reconnect(
+        _WS_URL, WEBSOCKET_RECONNECT_ATTEMPTS,
+        WEBSOCKET_RECONNECT_DELAY_S, initial_error
+    )
+    return _WS
+
+
 # ---------------------------------------------------------------------------
 # Output Processing (Images AND Videos)
 # ---------------------------------------------------------------------------
@@ -458,53 +1070,63 @@ def process_image_output(image_info: Dict[str, Any], job_id: str) -> Optional[Di
     img_type = image_info.get("type", "output")
 
     if img_type == "temp":
-        print(f"worker-xicon - Skipping temp image: {filename}")
+        logger.debug("worker-xicon - Skipping temp image: %s", filename)
         return None
 
     if not filename:
-        print(f"worker-xicon - Skipping image with missing filename")
+        logger.info("worker-xicon - Skipping image with missing filename")
         return None
 
-    image_bytes = get_file_data(filename, subfolder, img_type)
-    if not image_bytes:
-        print(f"worker-xicon - Failed to fetch image data for {filename}")
-        return None
-
-    file_extension = os.path.splitext(filename)[1] or ".png"
-
     if os.environ.get("BUCKET_ENDPOINT_URL"):
         try:
-            with tempfile.NamedTemporaryFile(suffix=file_extension, delete=False) as temp_file:
-                temp_file.write(image_bytes)
-                temp_file_path = temp_file.name
+            s3_url = _upload_view_to_s3(filename, subfolder, img_type, job_id)
+        except Exception as e:
+            logger.warning("worker-xicon - Error uploading %s to S3: %s", filename, e)
+            return None
+        if s3_url:
+            logger.info("worker-xicon - Uploaded %s to S3: %s", filename, s3_url)
+            return {"filename": filename, "type": "s3_url", "data": s3_url}
 
-            print(f"worker-xicon - Uploading {filename} to S3...")
-            s3_url = rp_upload.upload_image(job_id, temp_file_path)
-            os.remove(temp_file_path)
-            print(f"worker-xicon - Uploaded {filename} to S3: {s3_url}")
+    file_extension = os.path.splitext(filename)[1] or ".png"
+    with tempfile.NamedTemporaryFile(suffix=file_extension, delete=False) as temp_file:
+        temp_file_path = temp_file.name
 
-            return {"filename": filename, "type": "s3_url", "data": s3_url}
-        except Exception as e:
-            print(f"worker-xicon - Error uploading {filename} to S3: {e}")
-            if 'temp_file_path' in locals() and os.path.exists(temp_file_path):
-                try:
-                    os.remove(temp_file_path)
-                except OSError:
-                    pass
+    try:
+        if not stream_view_to_path(filename, subfolder, img_type, temp_file_path):
+            logger.warning("worker-xicon - Failed to fetch image data for %s", filename)
             return None
-    else:
+
+        if os.environ.get("BUCKET_ENDPOINT_URL"):
+            try:
+                logger.info("worker-xicon - Uploading %s to S3...", filename)
+                s3_url = rp_upload.upload_image(job_id, temp_file_path)
+                logger.info("worker-xicon - Uploaded %s to S3: %s", filename, s3_url)
+                return {"filename": filename, "type": "s3_url", "data": s3_url}
+            except Exception as e:
+                logger.warning("worker-xicon - Error uploading %s to S3: %s", filename, e)
+                return None
+        else:
+            try:
+                base64_image = _base64_file(temp_file_path)
+                return {"filename": filename, "type": "base64", "data": base64_image}
+            except Exception as e:
+                logger.warning("worker-xicon - Error encoding %s to base64: %s", filename, e)
+                return None
+    finally:
         try:
-            base64_image = base64.b64encode(image_bytes).decode("utf-8")
-            return {"filename": filename, "type": "base64", "data": base64_image}
-        except Exception as e:
-            print(f"worker-xicon - Error encoding {filename} to base64: {e}")
-            return None
+            os.remove(temp_file_path)
+        except OSError:
+            pass
 
 
 def process_video_output(video_info: Dict[str, Any], job_id: str) -> Optional[Dict[str, Any]]:
     """
     Process a video output from ComfyUI history (from VHS_VideoCombine 'gifs' key).
 
+    With a bucket configured the video is streamed from ComfyUI straight
+    into S3; otherwise it is streamed into a temp file and base64-encoded in
+    chunks, so the whole video is never held in memory as bytes.
+
     Args:
         video_info: Video info dict from ComfyUI history output
         job_id: Job ID for S3 upload naming
@@ -518,19 +1140,14 @@ def process_video_output(video_info: Dict[str, Any], job_id: str) -> Optional[Di
     video_format = video_info.get("format", "video/h264-mp4")
 
     if video_type == "temp":
-        print(f"worker-xicon - Skipping temp video: {filename}")
+        logger.debug("worker-xicon - Skipping temp video: %s", filename)
         return None
 
     if not filename:
-        print(f"worker-xicon - Skipping video with missing filename")
+        logger.info("worker-xicon - Skipping video with missing filename")
         return None
 
-    print(f"worker-xicon - Processing video: {filename}, format: {video_format}")
-
-    video_bytes = get_file_data(filename, subfolder, video_type)
-    if not video_bytes:
-        print(f"worker-xicon - Failed to fetch video data for {filename}")
-        return None
+    logger.info("worker-xicon - Processing video: %s, format: %s", filename, video_format)
 
     # Determine file extension from format
     format_to_ext = {
@@ -546,54 +1163,114 @@ def process_video_output(video_info: Dict[str, Any], job_id: str) -> Optional[Di
 
     if os.environ.get("BUCKET_ENDPOINT_URL"):
         try:
-            with tempfile.NamedTemporaryFile(suffix=file_ext, delete=False) as temp_file:
-                temp_file.write(video_bytes)
-                temp_file_path = temp_file.name
-
-            print(f"worker-xicon - Uploading video {filename} to S3...")
-            # Use upload_file for videos (more generic than upload_image)
-            s3_url = rp_upload.upload_file(job_id, temp_file_path)
-            os.remove(temp_file_path)
-            print(f"worker-xicon - Uploaded video {filename} to S3: {s3_url}")
-
+            s3_url = _upload_view_to_s3(filename, subfolder, video_type, job_id)
+        except Exception as e:
+            logger.warning("worker-xicon - Error uploading video %s to S3: %s", filename, e)
+            return None
+        if s3_url:
+            logger.info("worker-xicon - Uploaded video %s to S3: %s", filename, s3_url)
             return {
                 "filename": filename,
                 "type": "s3_url",
                 "data": s3_url,
                 "format": video_format
             }
-        except Exception as e:
-            print(f"worker-xicon - Error uploading video {filename} to S3: {e}")
-            if 'temp_file_path' in locals() and os.path.exists(temp_file_path):
-                try:
-                    os.remove(temp_file_path)
-                except OSError:
-                    pass
+
+    with tempfile.NamedTemporaryFile(suffix=file_ext, delete=False) as temp_file:
+        temp_file_path = temp_file.name
+
+    try:
+        if not stream_view_to_path(filename, subfolder, video_type, temp_file_path):
+            logger.warning("worker-xicon - Failed to fetch video data for %s", filename)
             return None
-    else:
+
+        if os.environ.get("BUCKET_ENDPOINT_URL"):
+            try:
+                logger.info("worker-xicon - Uploading video %s to S3...", filename)
+                # Use upload_file for videos (more generic than upload_image)
+                s3_url = rp_upload.upload_file(job_id, temp_file_path)
+                logger.info("worker-xicon - Uploaded video %s to S3: %s", filename, s3_url)
+
+                return {
+                    "filename": filename,
+                    "type": "s3_url",
+                    "data": s3_url,
+                    "format": video_format
+                }
+            except Exception as e:
+                logger.warning("worker-xicon - Error uploading video %s to S3: %s", filename, e)
+                return None
+        else:
+            try:
+                base64_video = _base64_file(temp_file_path)
+                logger.info("worker-xicon - Encoded video %s as base64", filename)
+                return {
+                    "filename": filename,
+                    "type": "base64",
+                    "data": base64_video,
+                    "format": video_format
+                }
+            except Exception as e:
+                logger.warning("worker-xicon - Error encoding video %s to base64: %s", filename, e)
+                return None
+    finally:
         try:
-            base64_video = base64.b64encode(video_bytes).decode("utf-8")
-            print(f"worker-xicon - Encoded video {filename} as base64")
-            return {
-                "filename": filename,
-                "type": "base64",
-                "data": base64_video,
-                "format": video_format
-            }
-        except Exception as e:
-            print(f"worker-xicon - Error encoding video {filename} to base64: {e}")
-            return None
+            os.remove(temp_file_path)
+        except OSError:
+            pass
+
+
+def prefetch_node_outputs(node_output: Dict[str, Any], job_id: str) -> Dict[str, List[Future]]:
+    """
+    Start processing a finished node's outputs on the output pool.
 
+    Called for 'executed' websocket messages, so /view fetches and uploads
+    for early nodes overlap with nodes that are still executing.
 
-def process_outputs(outputs: Dict[str, Any], job_id: str) -> Tuple[List[Dict], List[Dict], List[str]]:
+    Args:
+        node_output: The 'output' dict of an 'executed' message
+        job_id: Job ID for upload naming
+
+    Returns:
+        dict mapping 'images'/'gifs' to futures, in output order
+    """
+    return {
+        "images": [_OUTPUT_POOL.submit(process_image_output, info, job_id)
+                   for info in node_output.get("images", [])],
+        "gifs": [_OUTPUT_POOL.submit(process_video_output, info, job_id)
+                 for info in node_output.get("gifs", [])],
+    }
+
+
+def _discard_prefetched(prefetched: Dict[str, Tuple[Dict[str, Any], Dict[str, List[Future]]]]):
+    """
+    Cancel prefetched output work the job no longer needs.
+
+    Transfers already under way cannot be cancelled; they are waited for, so
+    no fetch or upload outlives the job that started it.
+    """
+    pending = [future for _, futures in prefetched.values()
+               for node_futures in futures.values() for future in node_futures]
+    for future in pending:
+        future.cancel()
+    wait(pending)
+
+
+def process_outputs(outputs: Dict[str, Any], job_id: str,
+                    prefetched: Optional[Dict[str, Tuple[Dict[str, Any], Dict[str, List[Future]]]]] = None
+                    ) -> Tuple[List[Dict], List[Dict], List[str]]:
     """
     Process all outputs from ComfyUI history, handling both images and videos.
 
     VHS_VideoCombine nodes output videos under the 'gifs' key (historical naming).
+    Every output is fetched/uploaded on the bounded output pool, so the
+    transfers overlap; results keep the history order.
 
     Args:
         outputs: The outputs dict from ComfyUI history
         job_id: Job ID for upload naming
+        prefetched: Optional node_id -> (node_output, futures) from
+            prefetch_node_outputs(); reused when the history output matches
 
     Returns:
         tuple: (images_list, videos_list, errors_list)
@@ -601,34 +1278,49 @@ def process_outputs(outputs: Dict[str, Any], job_id: str) -> Tuple[List[Dict], L
     images = []
     videos = []
     errors = []
+    prefetched = prefetched or {}
 
-    print(f"worker-xicon - Processing {len(outputs)} output nodes...")
+    logger.info("worker-xicon - Processing %s output nodes...", len(outputs))
 
+    # Submit everything first: (node_id, key, info, future)
+    pending = []
     for node_id, node_output in outputs.items():
-        # Handle standard image outputs
-        if "images" in node_output:
-            print(f"worker-xicon - Node {node_id} contains {len(node_output['images'])} image(s)")
-            for image_info in node_output["images"]:
-                result = process_image_output(image_info, job_id)
-                if result:
-                    images.append(result)
-                elif image_info.get("type") != "temp":
-                    errors.append(f"Failed to process image from node {node_id}")
-
-        # Handle video outputs from VHS_VideoCombine (uses 'gifs' key!)
-        if "gifs" in node_output:
-            print(f"worker-xicon - Node {node_id} contains {len(node_output['gifs'])} video(s)")
-            for video_info in node_output["gifs"]:
-                result = process_video_output(video_info, job_id)
-                if result:
-                    videos.append(result)
-                elif video_info.get("type") != "temp":
-                    errors.append(f"Failed to process video from node {node_id}")
+        seen_output, futures = prefetched.get(node_id, (None, {}))
+
+        # Standard image outputs, and video outputs from VHS_VideoCombine (uses 'gifs' key!)
+        for key, process in (("images", process_image_output), ("gifs", process_video_output)):
+            if key not in node_output:
+                continue
+            kind = "image" if key == "images" else "video"
+            logger.info("worker-xicon - Node %s contains %s %s(s)", node_id, len(node_output[key]), kind)
+            # Reuse prefetched work for each output the history still lists,
+            # so nothing is uploaded twice; cancel what no longer matches
+            stale = list(zip(seen_output.get(key, []), futures.get(key, []))) if seen_output else []
+            node_futures = []
+            for info in node_output[key]:
+                for i, (seen_info, future) in enumerate(stale):
+                    if seen_info == info:
+                        node_futures.append(stale.pop(i)[1])
+                        break
+                else:
+                    node_futures.append(_OUTPUT_POOL.submit(process, info, job_id))
+            for _, future in stale:
+                future.cancel()
+            for info, future in zip(node_output[key], node_futures):
+                pending.append((node_id, key, info, future))
 
         # Log any unhandled output types
         other_keys = [k for k in node_output.keys() if k not in ("images", "gifs")]
         if other_keys:
-            print(f"worker-xicon - Node {node_id} has unhandled output keys: {other_keys}")
+            logger.warning("worker-xicon - Node %s has unhandled output keys: %s", node_id, other_keys)
+
+    for node_id, key, info, future in pending:
+        result = future.result()
+        kind = "image" if key == "images" else "video"
+        if result:
+            (images if key == "images" else videos).append(result)
+        elif info.get("type") != "temp":
+            errors.append(f"Failed to process {kind} from node {node_id}")
 
     return images, videos, errors
 
@@ -640,16 +1332,22 @@ def process_outputs(outputs: Dict[str, Any], job_id: str) -> Tuple[List[Dict], L
 def cleanup_input_files(filenames: Dict[str, str]):
     """
     Remove downloaded input files after processing.
+
+    Entries are popped from filenames as they are handled, so calling this
+    again on the same dict is a no-op.
     """
-    for file_type, filename in filenames.items():
-        if filename:
-            filepath = os.path.join(COMFY_INPUT_DIR, filename)
-            try:
-                if os.path.exists(filepath):
-                    os.remove(filepath)
-                    print(f"worker-xicon - Cleaned up {file_type}: {filepath}")
-            except OSError as e:
-                print(f"worker-xicon - Failed to cleanup {filepath}: {e}")
+    while filenames:
+        file_type, filename = filenames.popitem()
+        if not filename:
+            continue
+        filepath = os.path.join(COMFY_INPUT_DIR, filename)
+        try:
+            os.unlink(filepath)
+            logger.info("worker-xicon - Cleaned up %s: %s", file_type, filepath)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("worker-xicon - Failed to cleanup %s: %s", filepath, e)
 
 
 # ---------------------------------------------------------------------------
@@ -672,15 +1370,16 @@ def handler(job: Dict[str, Any]) -> Dict[str, Any]:
     job_input = job.get("input", {})
     job_id = job.get("id", str(uuid.uuid4()))
 
-    print(f"worker-xicon - Processing job {job_id}")
+    logger.info("worker-xicon - Processing job %s", job_id)
 
     # Validate input
     validated_data, error_message = validate_input(job_input)
     if error_message:
         return {"error": error_message}
 
-    print(f"worker-xicon - Input validated: {validated_data['width']}x{validated_data['height']}, "
-          f"steps={validated_data['steps']}, cfg={validated_data['cfg']}")
+    logger.info("worker-xicon - Input validated: %sx%s, steps=%s, cfg=%s",
+                validated_data['width'], validated_data['height'],
+                validated_data['steps'], validated_data['cfg'])
 
     # Check ComfyUI server
     if not check_server(f"http://{COMFY_HOST}/",
@@ -693,7 +1392,7 @@ def handler(job: Dict[str, Any]) -> Dict[str, Any]:
     if error_message:
         return {"error": error_message}
 
-    print(f"worker-xicon - Downloaded files: {filenames}")
+    logger.info("worker-xicon - Downloaded files: %s", filenames)
 
     # Load workflow template
     workflow, error_message = load_workflow_template()
@@ -709,20 +1408,16 @@ def handler(job: Dict[str, Any]) -> Dict[str, Any]:
         return {"error": f"Failed to transform workflow: {e}"}
 
     # Execute workflow via WebSocket
-    ws = None
-    client_id = str(uuid.uuid4())
+    client_id = _CLIENT_ID
     prompt_id = None
     output_images = []
     output_videos = []
     errors = []
+    prefetched = {}
 
     try:
-        # Connect WebSocket
-        ws_url = f"ws://{COMFY_HOST}/ws?clientId={client_id}"
-        print(f"worker-xicon - Connecting to websocket: {ws_url}")
-        ws = websocket.WebSocket()
-        ws.connect(ws_url, timeout=10)
-        print(f"worker-xicon - Websocket connected")
+        # Reuse the worker websocket (connects on first use)
+        ws = _get_ws()
 
         # Queue workflow
         try:
@@ -730,77 +1425,102 @@ def handler(job: Dict[str, Any]) -> Dict[str, Any]:
             prompt_id = queued_workflow.get("prompt_id")
             if not prompt_id:
                 raise ValueError(f"Missing 'prompt_id' in queue response")
-            print(f"worker-xicon - Queued workflow with ID: {prompt_id}")
+            logger.info("worker-xicon - Queued workflow with ID: %s", prompt_id)
         except requests.RequestException as e:
             raise ValueError(f"Error queuing workflow: {e}")
 
         # Wait for execution
-        print(f"worker-xicon - Waiting for workflow execution ({prompt_id})...")
+        logger.info("worker-xicon - Waiting for workflow execution (%s)...", prompt_id)
         execution_done = False
-
-        while True:
+        last_progress_step = None
+
+        deadline = time.monotonic() + MAX_WORKFLOW_SECONDS
+        finished = False
+        while not finished:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # The worker outlives the job: don't leave the prompt running
+                # ahead of the next job, or reading inputs about to be deleted
+                cancel_prompt(prompt_id)
+                raise TimeoutError(
+                    f"Workflow {prompt_id} did not finish within {MAX_WORKFLOW_SECONDS}s"
+                )
+            ws.settimeout(min(remaining, IDLE_TICK_S))
             try:
-                out = ws.recv()
-                if isinstance(out, str):
-                    message = json.loads(out)
-                    msg_type = message.get("type")
-
-                    if msg_type == "status":
-                        status_data = message.get("data", {}).get("status", {})
-                        queue_remaining = status_data.get("exec_info", {}).get("queue_remaining", "N/A")
-                        print(f"worker-xicon - Status: {queue_remaining} items in queue")
-
-                    elif msg_type == "executing":
-                        data = message.get("data", {})
-                        if data.get("node") is None and data.get("prompt_id") == prompt_id:
-                            print(f"worker-xicon - Execution finished for prompt {prompt_id}")
-                            execution_done = True
-                            break
-
-                    elif msg_type == "execution_error":
-                        data = message.get("data", {})
-                        if data.get("prompt_id") == prompt_id:
-                            error_details = (
-                                f"Node Type: {data.get('node_type')}, "
-                                f"Node ID: {data.get('node_id')}, "
-                                f"Message: {data.get('exception_message')}"
-                            )
-                            print(f"worker-xicon - Execution error: {error_details}")
-                            errors.append(f"Workflow execution error: {error_details}")
-                            break
-
-                    elif msg_type == "progress":
-                        data = message.get("data", {})
-                        value = data.get("value", 0)
-                        max_val = data.get("max", 0)
-                        if max_val > 0:
-                            print(f"worker-xicon - Progress: {value}/{max_val} ({100*value//max_val}%)")
-
+                frames = _recv_coalesced(ws)
             except websocket.WebSocketTimeoutException:
-                print(f"worker-xicon - Websocket receive timed out, still waiting...")
                 continue
             except websocket.WebSocketConnectionClosedException as closed_err:
                 try:
-                    ws = _attempt_websocket_reconnect(
-                        ws_url, WEBSOCKET_RECONNECT_ATTEMPTS,
-                        WEBSOCKET_RECONNECT_DELAY_S, closed_err
-                    )
+                    ws = _reconnect_ws(closed_err)
                     continue
                 except websocket.WebSocketConnectionClosedException as e:
                     raise e
-            except json.JSONDecodeError:
-                print(f"worker-xicon - Received invalid JSON via websocket")
+
+            for out in frames:
+                try:
+                    message = _json_loads(out)
+                except json.JSONDecodeError:
+                    logger.warning("worker-xicon - Received invalid JSON via websocket")
+                    continue
+                msg_type = message.get("type")
+
+                if msg_type == "status":
+                    status_data = message.get("data", {}).get("status", {})
+                    queue_remaining = status_data.get("exec_info", {}).get("queue_remaining", "N/A")
+                    logger.debug("worker-xicon - Status: %s items in queue", queue_remaining)
+
+                elif msg_type == "executing":
+                    data = message.get("data", {})
+                    if data.get("node") is None and data.get("prompt_id") == prompt_id:
+                        logger.info("worker-xicon - Execution finished for prompt %s", prompt_id)
+                        execution_done = True
+                        finished = True
+                        break
+
+                elif msg_type == "executed":
+                    # Start fetching this node's outputs while later nodes run
+                    data = message.get("data", {})
+                    node_output = data.get("output") or {}
+                    if data.get("prompt_id") == prompt_id and ("images" in node_output or "gifs" in node_output):
+                        prefetched[data.get("node")] = (
+                            node_output, prefetch_node_outputs(node_output, job_id)
+                        )
+
+                elif msg_type == "execution_error":
+                    data = message.get("data", {})
+                    if data.get("prompt_id") == prompt_id:
+                        error_details = (
+                            f"Node Type: {data.get('node_type')}, "
+                            f"Node ID: {data.get('node_id')}, "
+                            f"Message: {data.get('exception_message')}"
+                        )
+                        logger.warning("worker-xicon - Execution error: %s", error_details)
+                        errors.append(f"Workflow execution error: {error_details}")
+                        finished = True
+                        break
+
+                elif msg_type == "progress":
+                    data = message.get("data", {})
+                    value = data.get("value", 0)
+                    max_val = data.get("max", 0)
+                    if max_val > 0:
+                        # Log only when a node crosses a 10% step
+                        step = (data.get("node"), (value * 10) // max_val)
+                        if step != last_progress_step:
+                            last_progress_step = step
+                            logger.info("worker-xicon - Progress: %s/%s (%s%%)", value, max_val, 100*value//max_val)
 
         if not execution_done and not errors:
             raise ValueError("Workflow loop exited without completion or error")
 
         # Fetch history and process outputs
-        print(f"worker-xicon - Fetching history for prompt {prompt_id}...")
+        logger.info("worker-xicon - Fetching history for prompt %s...", prompt_id)
         history = get_history(prompt_id)
 
         if prompt_id not in history:
             error_msg = f"Prompt ID {prompt_id} not found in history"
-            print(f"worker-xicon - {error_msg}")
+            logger.warning("worker-xicon - %s", error_msg)
             if errors:
                 errors.append(error_msg)
                 return {"error": "Job processing failed", "details": errors}
@@ -810,37 +1530,32 @@ def handler(job: Dict[str, Any]) -> Dict[str, Any]:
         outputs = prompt_history.get("outputs", {})
 
         if not outputs:
-            print(f"worker-xicon - No outputs found in history")
+            logger.warning("worker-xicon - No outputs found in history")
             errors.append("No outputs found in history")
 
         # Process all outputs (images AND videos)
-        output_images, output_videos, process_errors = process_outputs(outputs, job_id)
+        output_images, output_videos, process_errors = process_outputs(outputs, job_id, prefetched)
         errors.extend(process_errors)
 
     except websocket.WebSocketException as e:
-        print(f"worker-xicon - WebSocket Error: {e}")
-        print(traceback.format_exc())
-        cleanup_input_files(filenames)
+        logger.exception("worker-xicon - WebSocket Error: %s", e)
+        _close_ws()
         return {"error": f"WebSocket communication error: {e}"}
     except requests.RequestException as e:
-        print(f"worker-xicon - HTTP Request Error: {e}")
-        print(traceback.format_exc())
-        cleanup_input_files(filenames)
+        logger.exception("worker-xicon - HTTP Request Error: %s", e)
         return {"error": f"HTTP communication error: {e}"}
     except ValueError as e:
-        print(f"worker-xicon - Value Error: {e}")
-        print(traceback.format_exc())
-        cleanup_input_files(filenames)
+        logger.exception("worker-xicon - Value Error: %s", e)
+        return {"error": str(e)}
+    except TimeoutError as e:
+        logger.error("worker-xicon - %s", e)
         return {"error": str(e)}
     except Exception as e:
-        print(f"worker-xicon - Unexpected Error: {e}")
-        print(traceback.format_exc())
-        cleanup_input_files(filenames)
+        logger.exception("worker-xicon - Unexpected Error: %s", e)
         return {"error": f"Unexpected error: {e}"}
     finally:
-        if ws and ws.connected:
-            print(f"worker-xicon - Closing websocket connection")
-            ws.close()
+        # The websocket stays open for the next job; it is closed at exit
+        _discard_prefetched(prefetched)
         cleanup_input_files(filenames)
 
     # Build response
@@ -854,15 +1569,15 @@ def handler(job: Dict[str, Any]) -> Dict[str, Any]:
 
     if errors:
         result["errors"] = errors
-        print(f"worker-xicon - Job completed with {len(errors)} error(s)")
+        logger.warning("worker-xicon - Job completed with %s error(s)", len(errors))
 
     if not output_images and not output_videos:
         if errors:
             return {"error": "Job processing failed", "details": errors}
         result["status"] = "success_no_output"
-        print(f"worker-xicon - Job completed but produced no output")
+        logger.warning("worker-xicon - Job completed but produced no output")
 
-    print(f"worker-xicon - Job completed: {len(output_images)} image(s), {len(output_videos)} video(s)")
+    logger.info("worker-xicon - Job completed: %s image(s), %s video(s)", len(output_images), len(output_videos))
     return result
 
 
@@ -871,5 +1586,5 @@ def handler(job: Dict[str, Any]) -> Dict[str, Any]:
 # ---------------------------------------------------------------------------
 
 if __name__ == "__main__":
-    print("worker-xicon - Starting XiCON Dance SCAIL handler...")
+    logger.info("worker-xicon - Starting XiCON Dance SCAIL handler...")
     runpod.serverless.start({"handler": handler})
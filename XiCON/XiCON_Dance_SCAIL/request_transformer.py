@@ -5,14 +5,26 @@ Transforms user's custom request format into ComfyUI workflow with injected para
 Handles media downloads (images, videos) and parameter mapping.
 """
 
+import copy
 import json
 import os
+import shutil
+import threading
 import uuid
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union
 import requests
+from requests.adapters import HTTPAdapter
 from urllib.parse import urlparse
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # orjson not installed; fall back to the stdlib codec
+    orjson = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,6 +33,25 @@ logger = logging.getLogger(__name__)
 # ComfyUI input directory
 COMFYUI_INPUT_DIR = "/comfyui/input"
 
+# Largest server-reported Content-Length reserved with posix_fallocate before
+# the download; larger (or bogus) lengths are written without preallocation
+MAX_PREALLOCATE_BYTES = 8 * 1024 ** 3
+
+# Set once COMFYUI_INPUT_DIR has been created, so later downloads skip the mkdir
+_INPUT_DIR_READY = False
+_INPUT_DIR_LOCK = threading.Lock()
+
+# Shared download session: keeps connections to media hosts alive and
+# retries transient gateway errors with exponential backoff
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504]),
+)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+
 # Parameter mapping to workflow nodes
 PARAM_MAPPING = {
     "reference_image": {"node": "106", "field": "image"},
@@ -34,6 +65,40 @@ PARAM_MAPPING = {
 }
 
 
+# Numeric types accepted for width/height/cfg, and a marker for keys the
+# user did not supply (an explicit None is still rejected)
+_NUM = (int, float)
+_ABSENT = object()
+
+
+# (node_id, field, param key, default) for each injected parameter, resolved
+# from PARAM_MAPPING once at import
+_INJECTIONS = tuple(
+    (PARAM_MAPPING[name]["node"], PARAM_MAPPING[name]["field"], param_key, default)
+    for name, param_key, default in (
+        ("reference_image", "reference_image_filename", ""),
+        ("dance_video", "dance_video_filename", ""),
+        ("prompt", "prompt", ""),
+        ("width", "width", 416),
+        ("height", "height", 672),
+        ("steps", "steps", 6),
+        ("cfg", "cfg", 1.0),
+        ("seed", "seed", -1),
+    )
+)
+
+
+def _ensure_input_dir() -> None:
+    """Create COMFYUI_INPUT_DIR on first use; later calls return immediately."""
+    global _INPUT_DIR_READY
+    if _INPUT_DIR_READY:
+        return
+    with _INPUT_DIR_LOCK:
+        if not _INPUT_DIR_READY:
+            os.makedirs(COMFYUI_INPUT_DIR, exist_ok=True)
+            _INPUT_DIR_READY = True
+
+
 def download_media_from_url(url: str, media_type: str = "image") -> str:
     """
     Download media from URL and save to ComfyUI input directory.
@@ -52,24 +117,61 @@ def download_media_from_url(url: str, media_type: str = "image") -> str:
     if not url:
         raise ValueError("URL cannot be empty")
 
+    # Reject malformed URLs before any DNS lookup or connection attempt
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https"):
+        raise ValueError(f"Unsupported URL scheme: {parsed.scheme!r}")
+    if not parsed.netloc:
+        raise ValueError(f"URL has no host: {url}")
+
     try:
         # Generate unique filename with appropriate extension
         ext = ".jpg" if media_type == "image" else ".mp4"
-        filename = f"{uuid.uuid4()}{ext}"
+        filename = uuid.uuid4().hex + ext
         save_path = os.path.join(COMFYUI_INPUT_DIR, filename)
 
-        # Ensure input directory exists
-        os.makedirs(COMFYUI_INPUT_DIR, exist_ok=True)
+        # Ensure input directory exists (once per process)
+        _ensure_input_dir()
 
         # Download media with timeout
         logger.info(f"Downloading {media_type} from {url}")
-        response = requests.get(url, timeout=120, stream=True)
+        response = _SESSION.get(url, timeout=120, stream=True)
         response.raise_for_status()
 
-        # Save to file
-        with open(save_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        # Save to file, reading into one reusable buffer instead of per-chunk bytes
+        buffer_size = 4 * 1024 * 1024 if media_type == "video" else 1024 * 1024
+        try:
+            size = int(response.headers.get("Content-Length") or 0)
+        except ValueError:
+            size = 0  # malformed header; only used to size the preallocation
+        encoding = response.headers.get("Content-Encoding", "identity").lower()
+        try:
+            with open(save_path, "wb") as f:
+                if 0 < size <= MAX_PREALLOCATE_BYTES and hasattr(os, "posix_fallocate"):
+                    # Reserve the extent up front: less fragmentation, and a full
+                    # disk fails here instead of partway through the copy
+                    os.posix_fallocate(f.fileno(), 0, size)
+                if encoding == "identity":
+                    buf = bytearray(buffer_size)
+                    view = memoryview(buf)
+                    while True:
+                        n = response.raw.readinto(buf)
+                        if not n:
+                            break
+                        f.write(view[:n])
+                else:
+                    # Compressed body: let urllib3 decode it
+                    response.raw.decode_content = True
+                    shutil.copyfileobj(response.raw, f, buffer_size)
+                # Content-Length may not match the decoded size; drop any slack
+                f.truncate(f.tell())
+        except BaseException:
+            # Don't leave a partial (or fully preallocated) file behind
+            try:
+                os.unlink(save_path)
+            except OSError:
+                pass
+            raise
 
         logger.info(f"Successfully downloaded {media_type} to {filename}")
         return filename
@@ -82,9 +184,23 @@ def download_media_from_url(url: str, media_type: str = "image") -> str:
         raise
 
 
+def _discard_download(future) -> None:
+    """Remove the file saved by a successful download future, if any."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    try:
+        os.unlink(os.path.join(COMFYUI_INPUT_DIR, future.result()))
+    except OSError:
+        pass
+
+
 def inject_parameters(workflow: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Replace {{placeholders}} in workflow with actual values.
+    Inject parameter values into the workflow nodes listed in PARAM_MAPPING.
+
+    Values are assigned directly to workflow[node]["inputs"][field] on a
+    copy of the workflow, keeping their Python types. Nodes missing from the
+    workflow are skipped.
 
     Args:
         workflow: ComfyUI workflow dict
@@ -93,46 +209,15 @@ def inject_parameters(workflow: Dict[str, Any], params: Dict[str, Any]) -> Dict[
     Returns:
         Dict: Modified workflow with injected parameters
     """
-    # Convert workflow to string for placeholder replacement
-    workflow_str = json.dumps(workflow)
+    workflow = copy.deepcopy(workflow)
 
-    # Replace string placeholders
-    workflow_str = workflow_str.replace(
-        "{{reference_image_filename}}",
-        params.get("reference_image_filename", "")
-    )
-    workflow_str = workflow_str.replace(
-        "{{dance_video_filename}}",
-        params.get("dance_video_filename", "")
-    )
-    workflow_str = workflow_str.replace(
-        "{{prompt}}",
-        params.get("prompt", "")
-    )
+    for node_id, field, param_key, default in _INJECTIONS:
+        node = workflow.get(node_id)
+        if node is None:
+            continue
+        node.setdefault("inputs", {})[field] = params.get(param_key, default)
 
-    # Replace numeric placeholders (handle JSON number conversion)
-    workflow_str = workflow_str.replace(
-        '"{{width}}"',
-        str(params.get("width", 416))
-    )
-    workflow_str = workflow_str.replace(
-        '"{{height}}"',
-        str(params.get("height", 672))
-    )
-    workflow_str = workflow_str.replace(
-        '"{{steps}}"',
-        str(params.get("steps", 6))
-    )
-    workflow_str = workflow_str.replace(
-        '"{{cfg}}"',
-        str(params.get("cfg", 1.0))
-    )
-    workflow_str = workflow_str.replace(
-        '"{{seed}}"',
-        str(params.get("seed", -1))
-    )
-
-    return json.loads(workflow_str)
+    return workflow
 
 
 def validate_user_input(user_input: Dict[str, Any]) -> None:
@@ -155,35 +240,35 @@ def validate_user_input(user_input: Dict[str, Any]) -> None:
     if not videos.get("dance_video"):
         raise ValueError("dance_video is required in videos")
 
-    # Validate numeric parameters
-    width = user_input.get("width", 416)
-    height = user_input.get("height", 672)
-    steps = user_input.get("steps", 6)
-    cfg = user_input.get("cfg", 1.0)
-
-    if not isinstance(width, (int, float)) or width <= 0:
+    # Validate numeric parameters; absent keys fall back to known-good defaults
+    width = user_input.get("width", _ABSENT)
+    if width is not _ABSENT and (not isinstance(width, _NUM) or width <= 0):
         raise ValueError(f"Invalid width: {width}")
 
-    if not isinstance(height, (int, float)) or height <= 0:
+    height = user_input.get("height", _ABSENT)
+    if height is not _ABSENT and (not isinstance(height, _NUM) or height <= 0):
         raise ValueError(f"Invalid height: {height}")
 
-    if not isinstance(steps, int) or steps <= 0:
+    steps = user_input.get("steps", _ABSENT)
+    if steps is not _ABSENT and (not isinstance(steps, int) or steps <= 0):
         raise ValueError(f"Invalid steps: {steps}")
 
-    if not isinstance(cfg, (int, float)) or cfg < 0:
+    cfg = user_input.get("cfg", _ABSENT)
+    if cfg is not _ABSENT and (not isinstance(cfg, _NUM) or cfg < 0):
         raise ValueError(f"Invalid cfg: {cfg}")
 
 
 def transform_request_to_workflow(
     user_input: Dict[str, Any],
-    workflow_template: Dict[str, Any]
+    workflow_template: Union[Dict[str, Any], str, os.PathLike]
 ) -> Dict[str, Any]:
     """
     Main transformation function: convert user request to ComfyUI workflow.
 
     Args:
         user_input: User request with media URLs and parameters
-        workflow_template: ComfyUI workflow template
+        workflow_template: ComfyUI workflow template, or a path to one
+            (served from the template cache)
 
     Returns:
         Dict: Complete ComfyUI workflow with injected parameters
@@ -194,6 +279,12 @@ def transform_request_to_workflow(
     """
     logger.info("Starting request transformation")
 
+    if isinstance(workflow_template, (str, os.PathLike)):
+        # inject_parameters copies the template, so the cached dict is safe to pass
+        workflow_template = _load_cached(
+            os.fspath(workflow_template), os.stat(workflow_template).st_mtime_ns
+        )
+
     # Validate input
     validate_user_input(user_input)
 
@@ -204,14 +295,23 @@ def transform_request_to_workflow(
     ref_image_url = images.get("reference_image", "")
     dance_video_url = videos.get("dance_video", "")
 
-    # Download media files
+    # Download media files concurrently; requests releases the GIL on socket reads
     logger.info("Downloading media files")
+    executor = ThreadPoolExecutor(max_workers=2)
+    image_future = executor.submit(download_media_from_url, ref_image_url, "image")
+    video_future = executor.submit(download_media_from_url, dance_video_url, "video")
     try:
-        ref_image_filename = download_media_from_url(ref_image_url, "image")
-        dance_video_filename = download_media_from_url(dance_video_url, "video")
+        ref_image_filename = image_future.result()
+        dance_video_filename = video_future.result()
     except Exception as e:
+        # Fail fast: don't wait for the other download, and delete its file
+        # whenever it finishes, since nothing will reference it
+        for future in (image_future, video_future):
+            future.add_done_callback(_discard_download)
+        executor.shutdown(wait=False, cancel_futures=True)
         logger.error(f"Media download failed: {str(e)}")
         raise
+    executor.shutdown()
 
     # Prepare parameters for injection
     params = {
@@ -234,10 +334,25 @@ def transform_request_to_workflow(
     return modified_workflow
 
 
+@lru_cache(maxsize=4)
+def _load_cached(template_path: str, mtime_ns: int) -> Dict[str, Any]:
+    """
+    Parse a workflow template once per (path, mtime).
+
+    The returned dict is shared; callers must copy it before mutating.
+    """
+    with open(template_path, 'rb') as f:
+        data = f.read()
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
 def load_workflow_template(template_path: str) -> Dict[str, Any]:
     """
     Load workflow template from file.
 
+    Parsed templates are cached and re-read only when the file's mtime
+    changes; each call returns a fresh copy.
+
     Args:
         template_path: Path to workflow template JSON
 
@@ -248,8 +363,8 @@ def load_workflow_template(template_path: str) -> Dict[str, Any]:
         FileNotFoundError: If template file doesn't exist
         json.JSONDecodeError: If template is invalid JSON
     """
-    with open(template_path, 'r') as f:
-        return json.load(f)
+    mtime_ns = os.stat(template_path).st_mtime_ns
+    return copy.deepcopy(_load_cached(os.fspath(template_path), mtime_ns))
 
 
 if __name__ == "__main__":
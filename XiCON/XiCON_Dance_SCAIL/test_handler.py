@@ -0,0 +1,126 @@
+"""
+Unit tests for the handler's input download cache
+"""
+
+import hashlib
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+try:
+    import handler
+except ImportError:  # runpod / websocket-client not installed
+    handler = None
+
+
+def make_response(status_code=200, body=b"", headers=None):
+    """Build a mock streamed response"""
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.iter_content.return_value = [body] if body else []
+    if status_code >= 400:
+        response.raise_for_status.side_effect = handler.requests.HTTPError(str(status_code))
+    return response
+
+
+@unittest.skipIf(handler is None, "handler dependencies are not installed")
+class TestCachedDownload(unittest.TestCase):
+    """Test cases for cached_download and _evict_input_cache"""
+
+    def setUp(self):
+        """Point the cache and downloads at a temporary directory"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmpdir.name, "cache")
+        self.session = MagicMock()
+        patchers = [
+            patch.object(handler, "INPUT_CACHE_DIR", self.cache_dir),
+            patch.object(handler, "_get_download_session", return_value=self.session),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def target(self, name):
+        """Return a path in the temporary directory"""
+        return os.path.join(self.tmpdir.name, name)
+
+    def read(self, path):
+        """Return a file's content"""
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_miss_then_304_hit(self):
+        """Test a cached URL is revalidated and served from the cache on 304"""
+        url = "https://example.com/dance.mp4"
+        self.session.get.return_value = make_response(body=b"video", headers={"ETag": '"v1"'})
+
+        self.assertEqual(handler.cached_download(url, self.target("a.mp4"), "video"), (True, ""))
+        self.assertEqual(self.session.get.call_args.kwargs["headers"], {})
+
+        self.session.get.return_value = make_response(status_code=304)
+        self.assertEqual(handler.cached_download(url, self.target("b.mp4"), "video"), (True, ""))
+
+        self.assertEqual(self.session.get.call_args.kwargs["headers"], {"If-None-Match": '"v1"'})
+        self.assertEqual(self.read(self.target("b.mp4")), b"video")
+        self.session.head.assert_not_called()
+
+    def test_changed_object_replaces_cached_copy(self):
+        """Test a 200 for a cached URL replaces the entry's data"""
+        url = "https://example.com/dance.mp4"
+        self.session.get.return_value = make_response(body=b"old", headers={"ETag": '"v1"'})
+        handler.cached_download(url, self.target("a.mp4"), "video")
+
+        self.session.get.return_value = make_response(body=b"new", headers={"ETag": '"v2"'})
+        handler.cached_download(url, self.target("b.mp4"), "video")
+
+        self.assertEqual(self.read(self.target("b.mp4")), b"new")
+        (entry,) = os.listdir(self.cache_dir)
+        self.assertEqual(len(os.listdir(os.path.join(self.cache_dir, entry))), 2)
+
+    def test_signed_url_bypasses_cache(self):
+        """Test presigned URLs are downloaded without caching"""
+        url = "https://bucket.s3.amazonaws.com/dance.mp4?X-Amz-Signature=abc&X-Amz-Expires=60"
+        self.session.get.return_value = make_response(body=b"video", headers={"ETag": '"v1"'})
+
+        self.assertEqual(handler.cached_download(url, self.target("a.mp4"), "video"), (True, ""))
+
+        self.assertEqual(self.read(self.target("a.mp4")), b"video")
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def test_failed_download_leaves_no_entry(self):
+        """Test an HTTP error is reported and nothing is cached"""
+        self.session.get.return_value = make_response(status_code=404)
+
+        success, error = handler.cached_download("https://example.com/x.mp4", self.target("a.mp4"), "video")
+
+        self.assertFalse(success)
+        self.assertIn("Error downloading video", error)
+        self.assertEqual(os.listdir(self.cache_dir) if os.path.exists(self.cache_dir) else [], [])
+
+    def test_eviction_removes_oldest_entry_whole(self):
+        """Test eviction drops the least recently used entry with its validator"""
+        entries = {}
+        for last_used, name in enumerate(("old", "new"), start=1000):
+            url = f"https://example.com/{name}.mp4"
+            self.session.get.return_value = make_response(body=b"x" * 100, headers={"ETag": f'"{name}"'})
+            handler.cached_download(url, self.target(f"{name}.mp4"), "video")
+            os.unlink(self.target(f"{name}.mp4"))
+            entries[name] = os.path.join(self.cache_dir, hashlib.sha256(url.encode()).hexdigest())
+            for f in os.scandir(entries[name]):
+                os.utime(f.path, (last_used, last_used))
+
+        with patch.object(handler, "INPUT_CACHE_MAX_BYTES", 150):
+            handler._evict_input_cache()
+
+        self.assertFalse(os.path.exists(entries["old"]))
+        self.assertEqual(len(os.listdir(entries["new"])), 2)
+
+        self.session.get.return_value = make_response(status_code=304)
+        handler.cached_download("https://example.com/new.mp4", self.target("b.mp4"), "video")
+        self.assertEqual(self.session.get.call_args.kwargs["headers"], {"If-None-Match": '"new"'})
+
+if __name__ == '__main__':
+    unittest.main()
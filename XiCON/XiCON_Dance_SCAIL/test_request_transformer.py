@@ -2,9 +2,11 @@
 Unit tests for request_transformer module
 """
 
+import io
 import json
 import os
 import tempfile
+import threading
 import unittest
 from unittest.mock import patch, MagicMock
 from request_transformer import (
@@ -123,6 +125,14 @@ class TestRequestTransformer(unittest.TestCase):
         self.assertEqual(result["238"]["inputs"]["value"], 1.0)
         self.assertEqual(result["348"]["inputs"]["seed"], -1)
 
+    def test_inject_parameters_leaves_template_untouched(self):
+        """Test injection works on a copy and skips missing nodes"""
+        workflow = {"106": self.sample_workflow["106"]}
+        result = inject_parameters(workflow, {"reference_image_filename": "test.jpg"})
+
+        self.assertEqual(result, {"106": {"inputs": {"image": "test.jpg"}}})
+        self.assertEqual(workflow["106"]["inputs"]["image"], "{{reference_image_filename}}")
+
     def test_validate_user_input_success(self):
         """Test successful validation"""
         try:
@@ -174,13 +184,14 @@ class TestRequestTransformer(unittest.TestCase):
 
         self.assertIn("steps", str(context.exception))
 
-    @patch('request_transformer.requests.get')
+    @patch('request_transformer._SESSION.get')
     @patch('request_transformer.os.makedirs')
     def test_download_media_from_url_success(self, mock_makedirs, mock_get):
         """Test successful media download"""
         # Mock response
         mock_response = MagicMock()
-        mock_response.iter_content.return_value = [b"test data"]
+        mock_response.raw = io.BytesIO(b"test data")
+        mock_response.headers = {"Content-Length": "9"}
         mock_response.raise_for_status = MagicMock()
         mock_get.return_value = mock_response
 
@@ -189,13 +200,36 @@ class TestRequestTransformer(unittest.TestCase):
                 filename = download_media_from_url("http://example.com/test.jpg", "image")
 
                 self.assertTrue(filename.endswith(".jpg"))
-                self.assertTrue(os.path.exists(os.path.join(tmpdir, filename)))
+                with open(os.path.join(tmpdir, filename), "rb") as f:
+                    self.assertEqual(f.read(), b"test data")
+
+    @patch('request_transformer._SESSION.get')
+    def test_download_media_from_url_failure_removes_file(self, mock_get):
+        """Test a download failing mid-stream leaves no file behind"""
+        mock_response = MagicMock()
+        mock_response.raw.readinto.side_effect = ConnectionResetError("reset")
+        mock_response.headers = {"Content-Length": "1048576"}
+        mock_get.return_value = mock_response
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with patch('request_transformer.COMFYUI_INPUT_DIR', tmpdir):
+                with self.assertRaises(ConnectionResetError):
+                    download_media_from_url("http://example.com/test.mp4", "video")
+
+            self.assertEqual(os.listdir(tmpdir), [])
 
     def test_download_media_from_url_empty(self):
         """Test download fails with empty URL"""
         with self.assertRaises(ValueError):
             download_media_from_url("", "image")
 
+    def test_download_media_from_url_unsupported_scheme(self):
+        """Test download fails fast for non-http(s) URLs"""
+        with self.assertRaises(ValueError) as context:
+            download_media_from_url("file:///etc/passwd", "image")
+
+        self.assertIn("scheme", str(context.exception))
+
     def test_load_workflow_template_success(self):
         """Test loading workflow template from file"""
         with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
@@ -208,6 +242,19 @@ class TestRequestTransformer(unittest.TestCase):
         finally:
             os.unlink(temp_path)
 
+    def test_load_workflow_template_returns_copy(self):
+        """Test cached template loads hand out independent copies"""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+            json.dump(self.sample_workflow, f)
+            temp_path = f.name
+
+        try:
+            first = load_workflow_template(temp_path)
+            first["106"]["inputs"]["image"] = "changed.jpg"
+            self.assertEqual(load_workflow_template(temp_path), self.sample_workflow)
+        finally:
+            os.unlink(temp_path)
+
     def test_load_workflow_template_not_found(self):
         """Test loading non-existent template"""
         with self.assertRaises(FileNotFoundError):
@@ -216,7 +263,10 @@ class TestRequestTransformer(unittest.TestCase):
     @patch('request_transformer.download_media_from_url')
     def test_transform_request_to_workflow_success(self, mock_download):
         """Test complete transformation"""
-        mock_download.side_effect = ["ref.jpg", "dance.mp4"]
+        # Downloads run concurrently, so answer by media type rather than call order
+        mock_download.side_effect = lambda url, media_type: (
+            "ref.jpg" if media_type == "image" else "dance.mp4"
+        )
 
         result = transform_request_to_workflow(
             self.sample_user_input,
@@ -236,6 +286,26 @@ class TestRequestTransformer(unittest.TestCase):
         self.assertEqual(result["238"]["inputs"]["value"], 1.0)
         self.assertEqual(result["348"]["inputs"]["seed"], 42)
 
+    @patch('request_transformer.download_media_from_url')
+    def test_transform_request_to_workflow_failure_removes_sibling(self, mock_download):
+        """Test a failed download deletes the file the other download saved"""
+        video_saved = threading.Event()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            def download(url, media_type):
+                if media_type == "video":
+                    open(os.path.join(tmpdir, "dance.mp4"), "wb").close()
+                    video_saved.set()
+                    return "dance.mp4"
+                video_saved.wait(5)
+                raise ValueError("image download failed")
+
+            mock_download.side_effect = download
+            with patch('request_transformer.COMFYUI_INPUT_DIR', tmpdir):
+                with self.assertRaises(ValueError):
+                    transform_request_to_workflow(self.sample_user_input, self.sample_workflow)
+
+            self.assertEqual(os.listdir(tmpdir), [])
 
 if __name__ == '__main__':
     unittest.main()
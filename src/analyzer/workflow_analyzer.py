@@ -7,13 +7,47 @@ Parses ComfyUI workflow JSON files and extracts:
 - Input/Output types (image/video)
 """
 
+import copy
+import hashlib
 import json
+import os
+import pickle
+import sys
 from pathlib import Path
 from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
+from operator import attrgetter
 from typing import Optional
 
+try:
+    import orjson
+except ImportError:  # orjson not installed; fall back to the stdlib codec
+    orjson = None
 
-@dataclass
+try:
+    import ijson
+except ImportError:  # ijson not installed; large files are parsed whole
+    ijson = None
+
+
+def _loads(data: bytes | str):
+    """Parse JSON from bytes or str, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Persistent cache of file analyses, keyed by absolute path, mtime and size.
+# Bump _CACHE_VERSION whenever the analysis output changes.
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "xicon" / "workflow_analyses"
+_CACHE_VERSION = 2
+
+# Files larger than this are stream-parsed with ijson when it is installed;
+# below it, a single orjson/json parse is faster
+STREAMING_THRESHOLD_BYTES = 1 << 20
+
+
+@dataclass(slots=True)
 class ModelReference:
     """Represents a model file reference found in a workflow."""
     filename: str
@@ -31,7 +65,7 @@ class ModelReference:
         return False
 
 
-@dataclass
+@dataclass(slots=True)
 class NodeInfo:
     """Represents a node in the workflow."""
     node_id: str
@@ -40,7 +74,7 @@ class NodeInfo:
     inputs: dict = field(default_factory=dict)
 
 
-@dataclass
+@dataclass  # no slots: cached_property needs an instance __dict__
 class WorkflowAnalysis:
     """Complete analysis results of a workflow."""
     workflow_path: str
@@ -53,17 +87,32 @@ class WorkflowAnalysis:
     has_image_output: bool
     input_files: list[str]
 
+    @cached_property
+    def unique_node_types(self) -> list[str]:
+        """Sorted list of unique node types, computed once."""
+        return sorted(self.node_types)
+
+    @cached_property
+    def model_filenames(self) -> list[str]:
+        """Sorted list of model filenames, computed once."""
+        return sorted(m.filename for m in self.models)
+
     def get_unique_node_types(self) -> list[str]:
         """Return sorted list of unique node types."""
-        return sorted(self.node_types)
+        return self.unique_node_types
 
     def get_model_filenames(self) -> list[str]:
         """Return sorted list of model filenames."""
-        return sorted([m.filename for m in self.models])
+        return self.model_filenames
 
 
 class WorkflowAnalyzer:
-    """Analyzes ComfyUI workflow JSON files."""
+    """
+    Analyzes ComfyUI workflow JSON files.
+
+    The analyzer holds no per-instance state; use the shared
+    WorkflowAnalyzer.DEFAULT instead of constructing new ones.
+    """
 
     # Node types that indicate video input
     VIDEO_INPUT_NODES = {
@@ -91,25 +140,48 @@ class WorkflowAnalyzer:
         "PreviewImage",
     }
 
-    # Input keys that typically contain model filenames
-    MODEL_INPUT_KEYS = {
+    # Node type -> (analysis flag to set, input key holding the media filename)
+    _NODE_TYPE_FLAGS = {
+        **{t: ("has_video_input", "video") for t in VIDEO_INPUT_NODES},
+        **{t: ("has_video_output", None) for t in VIDEO_OUTPUT_NODES},
+        **{t: ("has_image_input", "image") for t in IMAGE_INPUT_NODES},
+        **{t: ("has_image_output", None) for t in IMAGE_OUTPUT_NODES},
+    }
+
+    # Input keys that typically contain model filenames (all lowercase)
+    MODEL_INPUT_KEYS = frozenset({
         "model", "model_name", "ckpt_name", "vae_name", "vae",
         "lora", "lora_name", "clip_name", "clip_vision",
         "unet_name", "vitpose_model", "yolo_model", "url",
-    }
+    })
 
     # File extensions that indicate model files
     MODEL_EXTENSIONS = {
         ".safetensors", ".pth", ".pt", ".ckpt", ".bin", ".onnx", ".torchscript"
     }
-
-    def __init__(self):
-        pass
+    _MODEL_EXT_TUPLE = tuple(MODEL_EXTENSIONS)
+
+    # Input key (or key substring) -> relative model directory, checked in order
+    PATH_MAPPING = {
+        "ckpt_name": "models/checkpoints",
+        "checkpoint": "models/checkpoints",
+        "vae_name": "models/vae",
+        "vae": "models/vae",
+        "lora": "models/loras",
+        "lora_name": "models/loras",
+        "clip_name": "models/clip_vision",
+        "clip_vision": "models/clip_vision",
+        "unet_name": "models/unet",
+        "model_name": "models/diffusion_models",
+    }
 
     def analyze(self, workflow_path: str | Path) -> WorkflowAnalysis:
         """
         Analyze a ComfyUI workflow JSON file.
 
+        Results are memoized in-process and on disk until the file's mtime or
+        size changes. Each call returns its own copy, so callers may mutate it.
+
         Args:
             workflow_path: Path to the workflow JSON file
 
@@ -117,114 +189,169 @@ class WorkflowAnalyzer:
             WorkflowAnalysis object containing the analysis results
         """
         workflow_path = Path(workflow_path)
+        stat = workflow_path.stat()
+        return copy.deepcopy(_analyze_file(str(workflow_path), stat.st_mtime_ns, stat.st_size))
+
+    def analyze_streaming(self, workflow_path: str | Path) -> WorkflowAnalysis:
+        """
+        Analyze a workflow file node by node without loading it whole.
+
+        Peak memory is bounded by the largest single node rather than the
+        file size. Requires the optional ijson package.
+
+        Args:
+            workflow_path: Path to the workflow JSON file
+
+        Returns:
+            WorkflowAnalysis object containing the analysis results
+        """
+        if ijson is None:
+            raise ImportError("ijson is required for streaming analysis")
+
+        with open(workflow_path, 'rb') as f:
+            return self._analyze_items(ijson.kvitems(f, '', use_float=True), str(workflow_path))
 
-        with open(workflow_path, 'r', encoding='utf-8') as f:
-            workflow_data = json.load(f)
+    def _analyze_dict(self, workflow_data: dict, workflow_path: str) -> WorkflowAnalysis:
+        """Analyze an already-parsed workflow dict."""
+        return self._analyze_items(workflow_data.items(), workflow_path)
+
+    def _analyze_items(self, node_items, workflow_path: str) -> WorkflowAnalysis:
+        """
+        Analyze a workflow given as (node_id, node_data) pairs.
 
+        Args:
+            node_items: Iterable of top-level workflow entries (ComfyUI API format)
+            workflow_path: Path (or label) recorded on the result
+
+        Returns:
+            WorkflowAnalysis object containing the analysis results
+        """
         nodes = []
         node_types = set()
         models = set()
+        seen_filenames = set()
         input_files = []
 
-        has_video_input = False
-        has_video_output = False
-        has_image_input = False
-        has_image_output = False
+        flags = dict.fromkeys(
+            ("has_video_input", "has_video_output", "has_image_input", "has_image_output"),
+            False,
+        )
 
-        for node_id, node_data in workflow_data.items():
+        # Bind hot attribute lookups to locals once, outside the node loop
+        nodes_append = nodes.append
+        node_types_add = node_types.add
+        models_add = models.add
+        seen_add = seen_filenames.add
+        input_files_append = input_files.append
+        node_type_flags = self._NODE_TYPE_FLAGS.get
+        is_model = self._is_model_reference
+        infer_path = self._infer_model_path
+
+        input_plans = _INPUT_PLANS
+        if len(input_plans) > _INPUT_PLANS_MAX:
+            input_plans.clear()
+
+        for node_id, node_data in node_items:
             class_type = node_data.get("class_type", "")
-            inputs = node_data.get("inputs", {})
-            meta = node_data.get("_meta", {})
-            title = meta.get("title")
-
-            node_info = NodeInfo(
-                node_id=node_id,
-                class_type=class_type,
-                title=title,
-                inputs=inputs
-            )
-            nodes.append(node_info)
-            node_types.add(class_type)
-
-            # Check for video/image input/output
-            if class_type in self.VIDEO_INPUT_NODES:
-                has_video_input = True
-                # Extract video filename
-                video_file = inputs.get("video")
-                if video_file and isinstance(video_file, str):
-                    input_files.append(video_file)
-
-            if class_type in self.VIDEO_OUTPUT_NODES:
-                has_video_output = True
-
-            if class_type in self.IMAGE_INPUT_NODES:
-                has_image_input = True
-                # Extract image filename
-                image_file = inputs.get("image")
-                if image_file and isinstance(image_file, str):
-                    input_files.append(image_file)
-
-            if class_type in self.IMAGE_OUTPUT_NODES:
-                has_image_output = True
-
-            # Extract model references
-            for key, value in inputs.items():
-                if self._is_model_reference(key, value):
-                    model_ref = ModelReference(
-                        filename=value,
-                        node_id=node_id,
-                        node_type=class_type,
-                        input_key=key,
-                        relative_path=self._infer_model_path(key, value)
-                    )
-                    models.add(model_ref)
+            inputs = node_data.get("inputs") or {}
+            title = (node_data.get("_meta") or {}).get("title")
+
+            nodes_append(NodeInfo(node_id, class_type, title, inputs))
+            node_types_add(class_type)
+
+            # Check for video/image input/output (one lookup per node)
+            flag_info = node_type_flags(class_type)
+            if flag_info is not None:
+                flag, input_key = flag_info
+                flags[flag] = True
+                if input_key is not None:
+                    # Extract the input media filename
+                    input_file = inputs.get(input_key)
+                    if input_file and isinstance(input_file, str):
+                        input_files_append(input_file)
+
+            # Extract model references. Key-only decisions come from a plan
+            # shared by every node with the same input layout
+            input_keys = tuple(inputs)
+            plan = input_plans.get(input_keys)
+            if plan is None:
+                plan = input_plans[input_keys] = self._input_plan(input_keys)
+            for (key_is_model, key_path), (key, value) in zip(plan, inputs.items()):
+                if key_is_model:
+                    if not isinstance(value, str):
+                        continue
+                elif not is_model(key, value):
+                    continue
+                # References compare by filename, so the first one wins
+                if value in seen_filenames:
+                    continue
+                # Share one str object (and its cached hash) per filename
+                value = sys.intern(value)
+                seen_add(value)
+                models_add(ModelReference(
+                    filename=value,
+                    node_id=node_id,
+                    node_type=class_type,
+                    input_key=key,
+                    relative_path=key_path if key_path is not None else infer_path(key, value)
+                ))
 
         return WorkflowAnalysis(
-            workflow_path=str(workflow_path),
+            workflow_path=workflow_path,
             nodes=nodes,
             node_types=node_types,
             models=models,
-            has_video_input=has_video_input,
-            has_video_output=has_video_output,
-            has_image_input=has_image_input,
-            has_image_output=has_image_output,
-            input_files=input_files
+            input_files=input_files,
+            **flags
         )
 
+    def _input_plan(self, input_keys: tuple[str, ...]) -> tuple[tuple[bool, Optional[str]], ...]:
+        """
+        Precompute the key-only part of the model checks for an input layout.
+
+        Args:
+            input_keys: A node's input keys, in order
+
+        Returns:
+            One (key_is_model, key_path) pair per key. key_is_model means any
+            str value is a model reference; key_path is the directory implied
+            by the key alone, if any.
+        """
+        model_keys = self.MODEL_INPUT_KEYS
+        plan = []
+        for key in input_keys:
+            key_is_model = key in model_keys or key.lower() in model_keys
+            # The empty filename never matches an extension rule, so this is
+            # exactly the key-derived part of _infer_model_path
+            plan.append((key_is_model, self._infer_model_path(key, "")))
+        return tuple(plan)
+
     def _is_model_reference(self, key: str, value) -> bool:
         """Check if a value is a model file reference."""
-        if not isinstance(value, str):
+        # Check if key suggests model first; most other inputs are node
+        # links ([node_id, index] lists), rejected below by an exact type check
+        if key in self.MODEL_INPUT_KEYS:
+            return isinstance(value, str)
+        if type(value) is not str:
             return False
 
-        # Check if key suggests model
+        # ComfyUI keys are nearly always lowercase already
         if key.lower() in self.MODEL_INPUT_KEYS:
             return True
 
-        # Check file extension
-        for ext in self.MODEL_EXTENSIONS:
-            if value.lower().endswith(ext):
-                return True
-
-        return False
+        # Check file extension (one C-level endswith over all extensions)
+        return (value.endswith(self._MODEL_EXT_TUPLE)
+                or value.lower().endswith(self._MODEL_EXT_TUPLE))
 
     def _infer_model_path(self, key: str, filename: str) -> Optional[str]:
         """Infer the relative model path based on key and filename."""
         key_lower = key.lower()
 
-        path_mapping = {
-            "ckpt_name": "models/checkpoints",
-            "checkpoint": "models/checkpoints",
-            "vae_name": "models/vae",
-            "vae": "models/vae",
-            "lora": "models/loras",
-            "lora_name": "models/loras",
-            "clip_name": "models/clip_vision",
-            "clip_vision": "models/clip_vision",
-            "unet_name": "models/unet",
-            "model_name": "models/diffusion_models",
-        }
-
-        for key_pattern, path in path_mapping.items():
+        # Exact key match is the common case; fall back to substring rules
+        path = self.PATH_MAPPING.get(key_lower)
+        if path is not None:
+            return path
+        for key_pattern, path in self.PATH_MAPPING.items():
             if key_pattern in key_lower:
                 return path
 
@@ -244,55 +371,85 @@ class WorkflowAnalyzer:
         Returns:
             WorkflowAnalysis object
         """
-        import tempfile
+        return self._analyze_dict(_loads(workflow_json), "<string>")
+
+
+WorkflowAnalyzer.DEFAULT = WorkflowAnalyzer()
 
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-            f.write(workflow_json)
-            temp_path = f.name
+# Input-key layout -> plan from WorkflowAnalyzer._input_plan. Repeated
+# analyses of the same kind of workflow reuse these across calls.
+_INPUT_PLANS: dict[tuple[str, ...], tuple] = {}
+_INPUT_PLANS_MAX = 4096
 
-        try:
-            result = self.analyze(temp_path)
-            result.workflow_path = "<string>"
-            return result
-        finally:
-            Path(temp_path).unlink()
+
+@lru_cache(maxsize=32)
+def _analyze_file(workflow_path: str, mtime_ns: int, size: int) -> WorkflowAnalysis:
+    """Analyze a workflow file, reusing the on-disk result when still valid."""
+    key = (_CACHE_VERSION, os.path.abspath(workflow_path), mtime_ns, size)
+    cache_file = CACHE_DIR / (hashlib.sha1(key[1].encode()).hexdigest() + ".pkl")
+
+    try:
+        with open(cache_file, "rb") as f:
+            cached_key, analysis = pickle.load(f)
+        if cached_key == key:
+            analysis.workflow_path = workflow_path
+            return analysis
+    except Exception:
+        pass  # missing, stale or unreadable cache entry
+
+    analyzer = WorkflowAnalyzer.DEFAULT
+    if ijson is not None and size > STREAMING_THRESHOLD_BYTES:
+        analysis = analyzer.analyze_streaming(workflow_path)
+    else:
+        analysis = analyzer._analyze_dict(_loads(Path(workflow_path).read_bytes()), workflow_path)
+
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, "wb") as f:
+            pickle.dump((key, analysis), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass  # caching is best-effort
+
+    return analysis
 
 
 def main():
     """CLI entry point for testing."""
-    import sys
 
     if len(sys.argv) < 2:
         print("Usage: python workflow_analyzer.py <workflow.json>")
         sys.exit(1)
 
-    analyzer = WorkflowAnalyzer()
-    analysis = analyzer.analyze(sys.argv[1])
+    analysis = WorkflowAnalyzer.DEFAULT.analyze(sys.argv[1])
 
-    print(f"\n=== Workflow Analysis: {analysis.workflow_path} ===\n")
-    print(f"Total nodes: {len(analysis.nodes)}")
-    print(f"Unique node types: {len(analysis.node_types)}")
-    print(f"Models referenced: {len(analysis.models)}")
-    print(f"\nVideo input: {analysis.has_video_input}")
-    print(f"Video output: {analysis.has_video_output}")
-    print(f"Image input: {analysis.has_image_input}")
-    print(f"Image output: {analysis.has_image_output}")
+    out = [f"\n=== Workflow Analysis: {analysis.workflow_path} ===\n"]
+    out.append(f"Total nodes: {len(analysis.nodes)}")
+    out.append(f"Unique node types: {len(analysis.node_types)}")
+    out.append(f"Models referenced: {len(analysis.models)}")
+    out.append(f"\nVideo input: {analysis.has_video_input}")
+    out.append(f"Video output: {analysis.has_video_output}")
+    out.append(f"Image input: {analysis.has_image_input}")
+    out.append(f"Image output: {analysis.has_image_output}")
 
-    print(f"\n--- Node Types ({len(analysis.node_types)}) ---")
+    out.append(f"\n--- Node Types ({len(analysis.node_types)}) ---")
     for node_type in analysis.get_unique_node_types():
-        print(f"  - {node_type}")
+        out.append(f"  - {node_type}")
 
-    print(f"\n--- Models ({len(analysis.models)}) ---")
-    for model in sorted(analysis.models, key=lambda m: m.filename):
-        print(f"  - {model.filename}")
-        print(f"      Node: {model.node_type} (ID: {model.node_id})")
+    out.append(f"\n--- Models ({len(analysis.models)}) ---")
+    for model in sorted(analysis.models, key=attrgetter("filename")):
+        out.append(f"  - {model.filename}")
+        out.append(f"      Node: {model.node_type} (ID: {model.node_id})")
         if model.relative_path:
-            print(f"      Path: {model.relative_path}")
+            out.append(f"      Path: {model.relative_path}")
 
     if analysis.input_files:
-        print(f"\n--- Input Files ---")
+        out.append(f"\n--- Input Files ---")
         for f in analysis.input_files:
-            print(f"  - {f}")
+            out.append(f"  - {f}")
+
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 if __name__ == "__main__":
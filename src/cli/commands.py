@@ -12,12 +12,23 @@ Usage:
 
 import argparse
 import sys
+from operator import attrgetter
 from pathlib import Path
 
 
+_BAR = "=" * 40
+_GENERATE_HEADER = f"\nXiCON Serverless RunPod Generator\n{_BAR}"
+_ANALYZE_HEADER = f"\nXiCON Workflow Analyzer\n{_BAR}"
+
+
+def _write_lines(lines):
+    """Write a block of output lines to stdout in a single call."""
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
 def cmd_generate(args):
     """Generate Dockerfile and related files from workflow."""
-    from ..generator.dockerfile_generator import DockerfileGenerator, GenerationConfig
+    from ..generator.dockerfile_generator import CONTEXT_TAR_NAME, DockerfileGenerator, GenerationConfig
 
     workflow_path = Path(args.workflow)
     if not workflow_path.exists():
@@ -31,38 +42,58 @@ def cmd_generate(args):
         include_docker_compose=not args.no_compose,
         include_readme=not args.no_readme,
         include_input_copy=args.copy_input,
-        container_name=args.container_name or workflow_path.stem.lower().replace(" ", "-")
+        container_name=args.container_name or workflow_path.stem.lower().replace(" ", "-"),
+        output_tar=args.tar,
+        one_layer_downloads=not args.layer_per_model,
+        use_templates=args.templates
     )
 
-    print(f"\nXiCON Serverless RunPod Generator")
-    print(f"{'='*40}")
-    print(f"Workflow: {workflow_path}")
-    print(f"Output:   {output_dir}")
-    print()
+    out = [_GENERATE_HEADER]
+    out.append(f"Workflow: {workflow_path}")
+    out.append(f"Output:   {output_dir}")
+    out.append("")
+    _write_lines(out)
 
     generator = DockerfileGenerator()
-    result = generator.generate(workflow_path, output_dir, config)
+    try:
+        result = generator.generate(workflow_path, output_dir, config)
+    except ImportError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
 
-    print(f"Generated files for: {result.workflow_name}")
+    out = [f"Generated files for: {result.workflow_name}"]
 
     if result.warnings:
-        print(f"\nWarnings:")
+        out.append(f"\nWarnings:")
         for warning in result.warnings:
-            print(f"  ! {warning}")
-
-    print(f"\nOutput directory: {result.output_dir}")
-    print(f"\nFiles created:")
-    print(f"  - Dockerfile")
+            out.append(f"  ! {warning}")
+
+    out.append(f"\nOutput directory: {result.output_dir}")
+    out.append(f"\nFiles created:")
+    indent = "  "
+    if config.output_tar:
+        out.append(f"  - {CONTEXT_TAR_NAME}, containing:")
+        indent = "      "
+    out.append(f"{indent}- Dockerfile")
     if config.include_docker_compose:
-        print(f"  - docker-compose.yml")
+        out.append(f"{indent}- docker-compose.yml")
     if config.include_readme:
-        print(f"  - README.md")
-
-    print(f"\nNext steps:")
-    print(f"  1. Review the generated Dockerfile")
-    print(f"  2. Add any missing node installations or model URLs")
-    print(f"  3. Test locally: cd {output_dir} && docker-compose up --build")
-    print(f"  4. Deploy to RunPod Serverless")
+        out.append(f"{indent}- README.md")
+
+    steps = [
+        "Review the generated Dockerfile",
+        "Add any missing node installations or model URLs",
+        f"Test locally: cd {output_dir} && docker-compose up --build",
+        "Deploy to RunPod Serverless",
+    ]
+    if config.output_tar:
+        # Only the archive is on disk; unpack it before reviewing or composing
+        steps.insert(0, f"Unpack the build context: cd {output_dir} && tar -xf {CONTEXT_TAR_NAME}")
+        steps[3] = (f"Test locally: docker-compose up --build "
+                    f"(or build the archive directly: docker build - < {CONTEXT_TAR_NAME})")
+    out.append(f"\nNext steps:")
+    out.extend(f"  {i}. {step}" for i, step in enumerate(steps, 1))
+    _write_lines(out)
 
 
 def cmd_add_node(args):
@@ -82,12 +113,13 @@ def cmd_add_node(args):
         save=True
     )
 
-    print(f"\nAdded node mapping:")
-    print(f"  Node type: {args.node_type}")
-    print(f"  Pack name: {args.pack_name or args.node_type.split('_')[0]}")
-    print(f"  Repository: {args.github_url}")
-    print(f"  Install method: {install_method}")
-    print(f"\nRegistry updated successfully.")
+    out = [f"\nAdded node mapping:"]
+    out.append(f"  Node type: {args.node_type}")
+    out.append(f"  Pack name: {args.pack_name or args.node_type.split('_')[0]}")
+    out.append(f"  Repository: {args.github_url}")
+    out.append(f"  Install method: {install_method}")
+    out.append(f"\nRegistry updated successfully.")
+    _write_lines(out)
 
 
 def cmd_add_model(args):
@@ -106,15 +138,17 @@ def cmd_add_model(args):
         save=True
     )
 
-    print(f"\nAdded model mapping:")
-    print(f"  Filename: {args.filename}")
-    print(f"  URL: {args.url}")
-    print(f"  Path: {args.path or '(auto-detected)'}")
-    print(f"\nRegistry updated successfully.")
+    out = [f"\nAdded model mapping:"]
+    out.append(f"  Filename: {args.filename}")
+    out.append(f"  URL: {args.url}")
+    out.append(f"  Path: {args.path or '(auto-detected)'}")
+    out.append(f"\nRegistry updated successfully.")
+    _write_lines(out)
 
 
 def cmd_analyze(args):
     """Analyze a workflow and show details."""
+    from concurrent.futures import ThreadPoolExecutor
     from ..analyzer.workflow_analyzer import WorkflowAnalyzer
     from ..mapper.node_mapper import NodeMapper
     from ..mapper.model_finder import ModelFinder
@@ -124,72 +158,80 @@ def cmd_analyze(args):
         print(f"Error: Workflow file not found: {workflow_path}")
         sys.exit(1)
 
-    print(f"\nXiCON Workflow Analyzer")
-    print(f"{'='*40}")
-    print(f"Workflow: {workflow_path}")
-    print()
+    # Load the registries in the background while the workflow is analyzed
+    pool = ThreadPoolExecutor(max_workers=2)
+    node_mapper_future = pool.submit(NodeMapper)
+    model_finder_future = pool.submit(ModelFinder)
+    pool.shutdown(wait=False)
+
+    out = [_ANALYZE_HEADER]
+    out.append(f"Workflow: {workflow_path}")
+    out.append("")
 
     # Analyze workflow
-    analyzer = WorkflowAnalyzer()
-    analysis = analyzer.analyze(workflow_path)
+    analysis = WorkflowAnalyzer.DEFAULT.analyze(workflow_path)
 
-    print(f"Total nodes: {len(analysis.nodes)}")
-    print(f"Unique node types: {len(analysis.node_types)}")
-    print(f"Models referenced: {len(analysis.models)}")
+    out.append(f"Total nodes: {len(analysis.nodes)}")
+    out.append(f"Unique node types: {len(analysis.node_types)}")
+    out.append(f"Models referenced: {len(analysis.models)}")
 
-    print(f"\nI/O Type:")
-    print(f"  Video input:  {analysis.has_video_input}")
-    print(f"  Video output: {analysis.has_video_output}")
-    print(f"  Image input:  {analysis.has_image_input}")
-    print(f"  Image output: {analysis.has_image_output}")
+    out.append(f"\nI/O Type:")
+    out.append(f"  Video input:  {analysis.has_video_input}")
+    out.append(f"  Video output: {analysis.has_video_output}")
+    out.append(f"  Image input:  {analysis.has_image_input}")
+    out.append(f"  Image output: {analysis.has_image_output}")
 
     # Map nodes
-    node_mapper = NodeMapper()
+    node_mapper = node_mapper_future.result()
     node_result = node_mapper.map_nodes(analysis.node_types)
 
-    print(f"\n--- Node Mapping ---")
-    print(f"Built-in nodes: {len(node_result.builtin)}")
-    print(f"Resolved custom nodes: {len(node_result.resolved)}")
-    print(f"Unresolved nodes: {len(node_result.unresolved)}")
+    out.append(f"\n--- Node Mapping ---")
+    out.append(f"Built-in nodes: {len(node_result.builtin)}")
+    out.append(f"Resolved custom nodes: {len(node_result.resolved)}")
+    out.append(f"Unresolved nodes: {len(node_result.unresolved)}")
 
     if node_result.required_packs:
-        print(f"\nRequired node packs ({len(node_result.required_packs)}):")
+        out.append(f"\nRequired node packs ({len(node_result.required_packs)}):")
         for pack in node_result.required_packs:
-            print(f"  - {pack.name}")
-            print(f"      {pack.repo}")
+            out.append(f"  - {pack.name}")
+            out.append(f"      {pack.repo}")
 
     if node_result.unresolved:
-        print(f"\nUnresolved nodes ({len(node_result.unresolved)}):")
+        out.append(f"\nUnresolved nodes ({len(node_result.unresolved)}):")
         for node in node_result.unresolved:
-            print(f"  - {node}")
+            out.append(f"  - {node}")
 
     # Lookup models
-    model_finder = ModelFinder()
-    model_filenames = [m.filename for m in analysis.models]
-    model_result = model_finder.lookup(model_filenames)
+    model_finder = model_finder_future.result()
+    model_result = model_finder.lookup(analysis.model_filenames)
 
-    print(f"\n--- Model Lookup ---")
-    print(f"Resolved models: {len(model_result.resolved)}")
-    print(f"Unresolved models: {len(model_result.unresolved)}")
-    print(f"Total size: {model_result.total_size_gb:.1f} GB")
+    out.append(f"\n--- Model Lookup ---")
+    out.append(f"Resolved models: {len(model_result.resolved)}")
+    out.append(f"Unresolved models: {len(model_result.unresolved)}")
+    out.append(f"Total size: {model_result.total_size_gb:.1f} GB")
 
     if model_result.unresolved:
-        print(f"\nUnresolved models ({len(model_result.unresolved)}):")
+        out.append(f"\nUnresolved models ({len(model_result.unresolved)}):")
         for model in model_result.unresolved:
-            print(f"  - {model}")
+            out.append(f"  - {model}")
 
     if args.verbose:
-        print(f"\n--- All Node Types ---")
-        for node_type in sorted(analysis.node_types):
-            status = "builtin" if node_type in node_result.builtin else \
-                     "resolved" if node_type in node_result.resolved else \
-                     "UNRESOLVED"
-            print(f"  [{status}] {node_type}")
+        # builtin is a list; test membership against a set
+        builtin = set(node_result.builtin)
+        resolved = node_result.resolved
+        out.append("\n--- All Node Types ---")
+        out.extend(
+            f"  [{'builtin' if t in builtin else 'resolved' if t in resolved else 'UNRESOLVED'}] {t}"
+            for t in analysis.unique_node_types
+        )
 
-        print(f"\n--- All Models ---")
-        for model in sorted(analysis.models, key=lambda m: m.filename):
-            status = "resolved" if model.filename in model_result.resolved else "UNRESOLVED"
-            print(f"  [{status}] {model.filename}")
+        out.append("\n--- All Models ---")
+        out.extend(
+            f"  [{'resolved' if m.filename in model_result.resolved else 'UNRESOLVED'}] {m.filename}"
+            for m in sorted(analysis.models, key=attrgetter("filename"))
+        )
+
+    _write_lines(out)
 
 
 def cmd_list_registry(args):
@@ -197,32 +239,99 @@ def cmd_list_registry(args):
     from ..mapper.node_mapper import NodeMapper
     from ..mapper.model_finder import ModelFinder
 
+    out = []
+
     if args.type == "nodes" or args.type == "all":
         mapper = NodeMapper()
-        print("\n=== Node Registry ===\n")
+        out.append("\n=== Node Registry ===\n")
 
-        print("Node Packs:")
+        out.append("Node Packs:")
         for pack_name, pack_data in mapper.node_packs.items():
-            print(f"\n  {pack_name}")
-            print(f"    Repo: {pack_data.get('repo', 'N/A')}")
+            out.append(f"\n  {pack_name}")
+            out.append(f"    Repo: {pack_data.get('repo', 'N/A')}")
             node_count = len(pack_data.get('nodes', []))
-            print(f"    Nodes: {node_count}")
+            out.append(f"    Nodes: {node_count}")
 
-        print(f"\nBuilt-in nodes: {len(mapper.builtin_nodes)}")
+        out.append(f"\nBuilt-in nodes: {len(mapper.builtin_nodes)}")
 
     if args.type == "models" or args.type == "all":
         finder = ModelFinder()
-        print("\n=== Model Registry ===\n")
+        out.append("\n=== Model Registry ===\n")
 
-        print("Models:")
+        out.append("Models:")
         for filename, model_data in finder.models.items():
-            print(f"\n  {filename}")
-            print(f"    Path: {model_data.get('relative_path', 'N/A')}")
-            print(f"    Size: {model_data.get('size_gb', 0):.1f} GB")
-
-
-def main():
-    """Main CLI entry point."""
+            out.append(f"\n  {filename}")
+            out.append(f"    Path: {model_data.get('relative_path', 'N/A')}")
+            out.append(f"    Size: {model_data.get('size_gb', 0):.1f} GB")
+
+    if out:
+        _write_lines(out)
+
+
+def _add_generate_args(parser):
+    parser.add_argument("workflow", help="Path to ComfyUI workflow JSON file")
+    parser.add_argument("-o", "--output", help="Output directory (default: output/<workflow_name>)")
+    parser.add_argument("--base-version", default="5.5.1-base",
+                        help="Base Docker image version (default: 5.5.1-base)")
+    parser.add_argument("--no-compose", action="store_true",
+                        help="Skip docker-compose.yml generation")
+    parser.add_argument("--no-readme", action="store_true",
+                        help="Skip README.md generation")
+    parser.add_argument("--copy-input", action="store_true",
+                        help="Include COPY input/ command in Dockerfile")
+    parser.add_argument("--container-name", help="Docker container name")
+    parser.add_argument("--layer-per-model", action="store_true",
+                        help="Emit a separate RUN (image layer) for each model download")
+    parser.add_argument("--templates", action="store_true",
+                        help="Render from the Jinja2 templates in templates/ (requires jinja2)")
+    parser.add_argument("--tar", action="store_true",
+                        help="Write all generated files into a single context.tar")
+
+
+def _add_node_args(parser):
+    parser.add_argument("node_type", help="Node class_type (e.g., WanVideoModelLoader)")
+    parser.add_argument("github_url", help="GitHub repository URL")
+    parser.add_argument("--pack-name", help="Node pack name (default: derived from node_type)")
+    parser.add_argument("--comfy-cli", action="store_true",
+                        help="Use comfy-cli for installation instead of git clone")
+    parser.add_argument("--has-requirements", action="store_true",
+                        help="Node pack has requirements.txt")
+
+
+def _add_model_args(parser):
+    parser.add_argument("filename", help="Model filename")
+    parser.add_argument("url", help="Download URL (HuggingFace, GitHub, etc.)")
+    parser.add_argument("--path", help="Relative path in ComfyUI (auto-detected if not specified)")
+    parser.add_argument("--size", type=float, help="Model size in GB")
+    parser.add_argument("--description", help="Model description")
+    parser.add_argument("--source", choices=["huggingface", "github", "civitai"],
+                        default="huggingface", help="Model source")
+
+
+def _add_analyze_args(parser):
+    parser.add_argument("workflow", help="Path to ComfyUI workflow JSON file")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="Show all nodes and models")
+
+
+def _add_list_args(parser):
+    parser.add_argument("type", choices=["nodes", "models", "all"],
+                        default="all", nargs="?", help="Registry type to list")
+
+
+# Command name -> (help text, argument builder, handler). Only the selected
+# command's parser is built on a normal run.
+COMMANDS = {
+    "generate": ("Generate Dockerfile from workflow", _add_generate_args, cmd_generate),
+    "add-node": ("Add node mapping to registry", _add_node_args, cmd_add_node),
+    "add-model": ("Add model URL to registry", _add_model_args, cmd_add_model),
+    "analyze": ("Analyze workflow without generating files", _add_analyze_args, cmd_analyze),
+    "list": ("List registry contents", _add_list_args, cmd_list_registry),
+}
+
+
+def _build_full_parser():
+    """Build the parser with every subcommand (used for help and errors)."""
     parser = argparse.ArgumentParser(
         description="XiCON Serverless RunPod Automation System",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -237,58 +346,32 @@ Examples:
     )
 
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
+    for name, (help_text, add_args, func) in COMMANDS.items():
+        sub_parser = subparsers.add_parser(name, help=help_text)
+        add_args(sub_parser)
+        sub_parser.set_defaults(func=func)
+
+    return parser
 
-    # Generate command
-    gen_parser = subparsers.add_parser("generate", help="Generate Dockerfile from workflow")
-    gen_parser.add_argument("workflow", help="Path to ComfyUI workflow JSON file")
-    gen_parser.add_argument("-o", "--output", help="Output directory (default: output/<workflow_name>)")
-    gen_parser.add_argument("--base-version", default="5.5.1-base",
-                           help="Base Docker image version (default: 5.5.1-base)")
-    gen_parser.add_argument("--no-compose", action="store_true",
-                           help="Skip docker-compose.yml generation")
-    gen_parser.add_argument("--no-readme", action="store_true",
-                           help="Skip README.md generation")
-    gen_parser.add_argument("--copy-input", action="store_true",
-                           help="Include COPY input/ command in Dockerfile")
-    gen_parser.add_argument("--container-name", help="Docker container name")
-    gen_parser.set_defaults(func=cmd_generate)
-
-    # Add-node command
-    node_parser = subparsers.add_parser("add-node", help="Add node mapping to registry")
-    node_parser.add_argument("node_type", help="Node class_type (e.g., WanVideoModelLoader)")
-    node_parser.add_argument("github_url", help="GitHub repository URL")
-    node_parser.add_argument("--pack-name", help="Node pack name (default: derived from node_type)")
-    node_parser.add_argument("--comfy-cli", action="store_true",
-                            help="Use comfy-cli for installation instead of git clone")
-    node_parser.add_argument("--has-requirements", action="store_true",
-                            help="Node pack has requirements.txt")
-    node_parser.set_defaults(func=cmd_add_node)
-
-    # Add-model command
-    model_parser = subparsers.add_parser("add-model", help="Add model URL to registry")
-    model_parser.add_argument("filename", help="Model filename")
-    model_parser.add_argument("url", help="Download URL (HuggingFace, GitHub, etc.)")
-    model_parser.add_argument("--path", help="Relative path in ComfyUI (auto-detected if not specified)")
-    model_parser.add_argument("--size", type=float, help="Model size in GB")
-    model_parser.add_argument("--description", help="Model description")
-    model_parser.add_argument("--source", choices=["huggingface", "github", "civitai"],
-                             default="huggingface", help="Model source")
-    model_parser.set_defaults(func=cmd_add_model)
-
-    # Analyze command
-    analyze_parser = subparsers.add_parser("analyze", help="Analyze workflow without generating files")
-    analyze_parser.add_argument("workflow", help="Path to ComfyUI workflow JSON file")
-    analyze_parser.add_argument("-v", "--verbose", action="store_true",
-                               help="Show all nodes and models")
-    analyze_parser.set_defaults(func=cmd_analyze)
-
-    # List command
-    list_parser = subparsers.add_parser("list", help="List registry contents")
-    list_parser.add_argument("type", choices=["nodes", "models", "all"],
-                            default="all", nargs="?", help="Registry type to list")
-    list_parser.set_defaults(func=cmd_list_registry)
-
-    args = parser.parse_args()
+
+def main(argv=None):
+    """Main CLI entry point."""
+    argv = sys.argv[1:] if argv is None else argv
+
+    # Fast path: build only the parser for the requested command
+    if argv and argv[0] in COMMANDS:
+        name = argv[0]
+        help_text, add_args, func = COMMANDS[name]
+        parser = argparse.ArgumentParser(prog=f"{Path(sys.argv[0]).name} {name}",
+                                         description=help_text)
+        add_args(parser)
+        args = parser.parse_args(argv[1:])
+        args.command = name
+        func(args)
+        return
+
+    parser = _build_full_parser()
+    args = parser.parse_args(argv)
 
     if args.command is None:
         parser.print_help()
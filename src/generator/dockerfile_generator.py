@@ -5,17 +5,214 @@ Generates Dockerfile, docker-compose.yml, and README.md from
 workflow analysis results.
 """
 
+import io
+import tarfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from string import Template
 from datetime import datetime
 from dataclasses import dataclass, field
-from typing import Optional
+from functools import cached_property
+from itertools import chain
+from typing import Iterator, Optional
+
+try:
+    import jinja2
+except ImportError:  # jinja2 not installed; only the built-in renderers are available
+    jinja2 = None
 
 from ..analyzer.workflow_analyzer import WorkflowAnalysis, WorkflowAnalyzer
 from ..mapper.node_mapper import NodeMapper, NodeMappingResult
 from ..mapper.model_finder import ModelFinder, ModelLookupResult
 
 
-@dataclass
+# Section separator used throughout the generated Dockerfile
+SEP = "# " + "=" * 76
+
+# Archive written instead of separate files when GenerationConfig.output_tar is set
+CONTEXT_TAR_NAME = "context.tar"
+
+# Jinja2 templates in templates_dir, by output file (used with GenerationConfig.use_templates)
+TEMPLATE_FILES = {
+    "Dockerfile": "Dockerfile.template",
+    "docker-compose.yml": "docker-compose.template.yml",
+    "README.md": "README.template.md",
+}
+
+# Fixed banners and section headers of the Dockerfile
+BANNER = (
+    SEP,
+    "# XiCON Serverless RunPod Dockerfile",
+    "# Generated by XiCON Automation System",
+    SEP,
+)
+NODES_HEADER = (SEP, "# Custom Node Installation", SEP)
+MODELS_HEADER = (SEP, "# Model Downloads", SEP)
+UNRESOLVED_NODES_HEADER = (
+    "",
+    SEP,
+    "# UNRESOLVED NODES - Manual installation required",
+    SEP,
+    "# The following nodes could not be automatically resolved:",
+)
+UNRESOLVED_MODELS_HEADER = (
+    "",
+    SEP,
+    "# UNRESOLVED MODELS - Manual download required",
+    SEP,
+    "# The following models could not be automatically resolved:",
+)
+
+# Fixed trailing sections of the Dockerfile
+INPUT_COPY_SECTION = (
+    "",
+    SEP,
+    "# Input Files",
+    SEP,
+    "# Copy input files (images/videos) into ComfyUI",
+    "COPY input/ /comfyui/input/",
+)
+
+FINALIZE_SECTION = (
+    "",
+    SEP,
+    "# Finalize",
+    SEP,
+    "# Ensure proper permissions",
+    "RUN chmod -R 755 /comfyui/custom_nodes",
+    "",
+    "# Set working directory",
+    "WORKDIR /comfyui",
+)
+
+# One README models-section entry per resolved model
+README_MODEL_ENTRY = "- **{filename}** ({size_gb:.1f} GB)\n  - Path: `{relative_path}`\n  - URL: {url}"
+
+# README.md template, parsed once at import; filled in by _generate_readme
+README_TEMPLATE = Template("""# ${workflow_name} - RunPod Serverless Endpoint
+
+Generated by XiCON Serverless RunPod Automation System
+
+## Overview
+
+- **Workflow**: ${workflow_name}
+- **Generated**: ${timestamp}
+- **Input Type**: ${input_type}
+- **Output Type**: ${output_type}
+
+## Requirements
+
+- Docker with NVIDIA GPU support
+- NVIDIA Container Toolkit
+- ~${total_size_gb} GB disk space for models
+
+## Quick Start
+
+### Local Development
+
+1. **Build and run with Docker Compose**:
+```bash
+docker-compose up --build
+```
+
+2. **Access ComfyUI**: Open http://localhost:8188
+
+3. **Load the workflow**: Use the workflow JSON file
+
+### RunPod Deployment
+
+1. **Push to GitHub** (recommended):
+```bash
+git init
+git add .
+git commit -m "Initial commit"
+git remote add origin https://github.com/your-username/your-repo.git
+git push -u origin main
+```
+
+2. **Create RunPod Endpoint**:
+   - Go to [RunPod Serverless](https://runpod.io/console/serverless)
+   - Create new endpoint
+   - Select "Custom Source" and enter your GitHub repo URL
+   - Configure GPU type (recommended: A100/A40 for video generation)
+
+3. **API Usage**:
+```bash
+curl -X POST "https://api.runpod.ai/v2/$${ENDPOINT_ID}/run" \\
+  -H "Authorization: Bearer $${RUNPOD_API_KEY}" \\
+  -H "Content-Type: application/json" \\
+  -d '{
+    "input": {
+      "workflow": <your-workflow-json>,
+      "images": [
+        {
+          "name": "input_image.jpg",
+          "image": "<base64-encoded-image>"
+        }
+      ]
+    }
+  }'
+```
+
+## Custom Nodes Used
+
+${nodes_section}
+
+${unresolved_nodes_section}
+
+## Models
+
+${models_section}
+
+${unresolved_models_section}
+
+## Input/Output
+
+### Input
+${image_input_line}
+${video_input_line}
+
+### Output
+${video_output_line}
+${image_output_line}
+
+## Troubleshooting
+
+### Build Failures
+
+1. **Custom node installation fails**:
+   - Check if the GitHub repo exists and is accessible
+   - Some nodes may have additional dependencies
+
+2. **Model download fails**:
+   - Verify the HuggingFace URL is correct
+   - Some models may require authentication
+
+### Runtime Issues
+
+1. **Out of Memory**:
+   - Use a GPU with more VRAM (24GB+ recommended for video)
+   - Enable model offloading in the workflow
+
+2. **Slow Generation**:
+   - Check GPU utilization
+   - Consider using FP8 or FP16 models
+
+## License
+
+This generated configuration is provided as-is. Please check the licenses of:
+- Individual custom nodes
+- Model files
+- ComfyUI itself
+
+---
+
+Generated with [XiCON Serverless RunPod Automation](https://github.com/your-repo)
+""")
+
+
+@dataclass(slots=True)
 class GenerationConfig:
     """Configuration for Dockerfile generation."""
     base_version: str = "5.5.1-base"
@@ -23,9 +220,12 @@ class GenerationConfig:
     include_readme: bool = True
     include_input_copy: bool = False
     container_name: str = "xicon-comfyui"
+    output_tar: bool = False  # write all files into one CONTEXT_TAR_NAME archive
+    one_layer_downloads: bool = True  # chain model downloads into one RUN per tool
+    use_templates: bool = False  # render from templates_dir with Jinja2 (requires jinja2)
 
 
-@dataclass
+@dataclass(slots=True)
 class GenerationResult:
     """Result of Dockerfile generation."""
     dockerfile_content: str
@@ -56,10 +256,32 @@ class DockerfileGenerator:
 
         self.templates_dir = Path(templates_dir)
 
-        # Initialize components
-        self.analyzer = WorkflowAnalyzer()
-        self.node_mapper = NodeMapper(node_registry_path)
-        self.model_finder = ModelFinder(model_registry_path)
+        # Registries are loaded on first use of node_mapper / model_finder
+        self.analyzer = WorkflowAnalyzer.DEFAULT
+        self._node_registry_path = node_registry_path
+        self._model_registry_path = model_registry_path
+
+    @cached_property
+    def template_env(self) -> "jinja2.Environment":
+        """Jinja2 environment for templates_dir; compiled templates are kept for its lifetime."""
+        return jinja2.Environment(
+            loader=jinja2.FileSystemLoader(self.templates_dir),
+            auto_reload=False,
+            cache_size=-1,
+            trim_blocks=True,
+            lstrip_blocks=True,
+            keep_trailing_newline=True,
+        )
+
+    @cached_property
+    def node_mapper(self) -> NodeMapper:
+        """Node mapper for the configured node registry."""
+        return NodeMapper(self._node_registry_path)
+
+    @cached_property
+    def model_finder(self) -> ModelFinder:
+        """Model finder for the configured model registry."""
+        return ModelFinder(self._model_registry_path)
 
     def generate(self,
                  workflow_path: str | Path,
@@ -78,6 +300,8 @@ class DockerfileGenerator:
         """
         if config is None:
             config = GenerationConfig()
+        if config.use_templates and jinja2 is None:
+            raise ImportError("use_templates requires jinja2; install it or use the built-in renderer")
 
         workflow_path = Path(workflow_path)
         workflow_name = workflow_path.stem
@@ -85,28 +309,23 @@ class DockerfileGenerator:
         # Analyze workflow
         analysis = self.analyzer.analyze(workflow_path)
 
-        # Map nodes
-        node_result = self.node_mapper.map_nodes(analysis.node_types)
+        # Map nodes and find models side by side; both depend only on the
+        # analysis, and each loads its registry on first use
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            node_future = pool.submit(lambda: self.node_mapper.map_nodes(analysis.node_types))
+            model_future = pool.submit(lambda: self.model_finder.lookup(analysis.model_filenames))
+            node_result = node_future.result()
+            model_result = model_future.result()
 
-        # Find models
-        model_filenames = [m.filename for m in analysis.models]
-        model_result = self.model_finder.lookup(model_filenames)
-
-        # Generate content
-        dockerfile_content = self._generate_dockerfile(
-            analysis, node_result, model_result, config, workflow_name
-        )
-
-        docker_compose_content = None
-        if config.include_docker_compose:
-            docker_compose_content = self._generate_docker_compose(
-                analysis, config, workflow_name
+        # Generate content (one timestamp shared by all generated files)
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if config.use_templates:
+            dockerfile_content, docker_compose_content, readme_content = self._render_templates(
+                analysis, node_result, model_result, config, workflow_name, timestamp
             )
-
-        readme_content = None
-        if config.include_readme:
-            readme_content = self._generate_readme(
-                analysis, node_result, model_result, config, workflow_name
+        else:
+            dockerfile_content, docker_compose_content, readme_content = self._render_builtin(
+                analysis, node_result, model_result, config, workflow_name, timestamp
             )
 
         # Collect warnings
@@ -138,159 +357,255 @@ class DockerfileGenerator:
             output_dir.mkdir(parents=True, exist_ok=True)
             result.output_dir = output_dir
 
-            (output_dir / "Dockerfile").write_text(dockerfile_content, encoding='utf-8')
+            outputs = [
+                ("Dockerfile", dockerfile_content),
+                ("docker-compose.yml", docker_compose_content),
+                ("README.md", readme_content),
+            ]
+            # Each file is small enough to encode whole and write in one call
+            if config.output_tar:
+                self._write_tar(output_dir / CONTEXT_TAR_NAME, outputs)
+            else:
+                for name, content in outputs:
+                    if content:
+                        (output_dir / name).write_bytes(content.encode('utf-8'))
 
-            if docker_compose_content:
-                (output_dir / "docker-compose.yml").write_text(
-                    docker_compose_content, encoding='utf-8'
-                )
+        return result
 
-            if readme_content:
-                (output_dir / "README.md").write_text(
-                    readme_content, encoding='utf-8'
-                )
+    def _render_builtin(self,
+                        analysis: WorkflowAnalysis,
+                        node_result: NodeMappingResult,
+                        model_result: ModelLookupResult,
+                        config: GenerationConfig,
+                        workflow_name: str,
+                        timestamp: str) -> tuple[str, Optional[str], Optional[str]]:
+        """Render the Dockerfile, docker-compose.yml and README.md with the built-in builders."""
+        dockerfile_content = self._generate_dockerfile(
+            analysis, node_result, model_result, config, workflow_name, timestamp
+        )
 
-        return result
+        docker_compose_content = None
+        if config.include_docker_compose:
+            docker_compose_content = self._generate_docker_compose(
+                analysis, config, workflow_name, timestamp
+            )
+
+        readme_content = None
+        if config.include_readme:
+            readme_content = self._generate_readme(
+                analysis, node_result, model_result, config, workflow_name, timestamp
+            )
+
+        return dockerfile_content, docker_compose_content, readme_content
+
+    def _render_templates(self,
+                          analysis: WorkflowAnalysis,
+                          node_result: NodeMappingResult,
+                          model_result: ModelLookupResult,
+                          config: GenerationConfig,
+                          workflow_name: str,
+                          timestamp: str) -> tuple[str, Optional[str], Optional[str]]:
+        """Render the Dockerfile, docker-compose.yml and README.md from the Jinja2 templates."""
+        input_type, output_type = self._io_types(analysis)
+
+        context = {
+            "workflow_name": workflow_name,
+            "timestamp": timestamp,
+            "base_version": config.base_version,
+            "container_name": self._container_name(config, workflow_name),
+            "input_copy": config.include_input_copy,
+            "custom_nodes": node_result.required_packs,
+            "unresolved_nodes": node_result.unresolved,
+            "models": list(model_result.resolved.values()),
+            "model_downloads": self._model_downloads(model_result, config),
+            "unresolved_models": model_result.unresolved,
+            "total_model_size_gb": f"{model_result.total_size_gb:.1f}",
+            "input_type": input_type,
+            "output_type": output_type,
+            "image_input_line": "- Reference image (JPEG/PNG)" if analysis.has_image_input else "",
+            "video_input_line": "- Source video (MP4, any length)" if analysis.has_video_input else "",
+            "video_output_line": "- Generated video (MP4/H264)" if analysis.has_video_output else "",
+            "image_output_line": "- Generated images (PNG)" if analysis.has_image_output else "",
+        }
+
+        def render(name: str) -> str:
+            return self.template_env.get_template(TEMPLATE_FILES[name]).render(context)
+
+        return (
+            render("Dockerfile"),
+            render("docker-compose.yml") if config.include_docker_compose else None,
+            render("README.md") if config.include_readme else None,
+        )
+
+    @staticmethod
+    def _io_types(analysis: WorkflowAnalysis) -> tuple[str, str]:
+        """Describe the workflow's input and output media, e.g. ("video + image", "video")."""
+        input_types = []
+        if analysis.has_video_input:
+            input_types.append("video")
+        if analysis.has_image_input:
+            input_types.append("image")
+
+        output_types = []
+        if analysis.has_video_output:
+            output_types.append("video")
+        if analysis.has_image_output:
+            output_types.append("image")
+
+        input_type = " + ".join(input_types) if input_types else "none"
+        output_type = " + ".join(output_types) if output_types else "none"
+        return input_type, output_type
+
+    @staticmethod
+    def _container_name(config: GenerationConfig, workflow_name: str) -> str:
+        """Return the configured container name, or one derived from the workflow name."""
+        return config.container_name or workflow_name.lower().replace(" ", "-").replace("(", "").replace(")", "")
+
+    @staticmethod
+    def _write_tar(tar_path: Path, outputs: list[tuple[str, Optional[str]]]):
+        """Write the generated files as members of a single tar archive."""
+        mtime = time.time()
+        with tarfile.open(tar_path, "w", bufsize=1 << 20) as tf:
+            for name, content in outputs:
+                if not content:
+                    continue
+                data = content.encode('utf-8')
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = mtime
+                info.mode = 0o644
+                tf.addfile(info, io.BytesIO(data))
 
     def _generate_dockerfile(self,
                              analysis: WorkflowAnalysis,
                              node_result: NodeMappingResult,
                              model_result: ModelLookupResult,
                              config: GenerationConfig,
-                             workflow_name: str) -> str:
+                             workflow_name: str,
+                             timestamp: str) -> str:
         """Generate Dockerfile content."""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        lines = [
-            "# ============================================================================",
-            "# XiCON Serverless RunPod Dockerfile",
-            "# Generated by XiCON Automation System",
-            "# ============================================================================",
+        header = (
             f"# Workflow: {workflow_name}",
             f"# Generated: {timestamp}",
-            "# ============================================================================",
+            SEP,
             "",
             "# Base image with ComfyUI pre-installed",
             f"FROM runpod/worker-comfyui:{config.base_version}",
             "",
-        ]
+        )
 
-        # Custom node installation section
-        lines.append("# ============================================================================")
-        lines.append("# Custom Node Installation")
-        lines.append("# ============================================================================")
+        return "\n".join(chain(
+            BANNER,
+            header,
+            self._node_section(node_result),
+            self._model_section(model_result, config),
+            self._input_section(config),
+            FINALIZE_SECTION,
+        ))
+
+    @staticmethod
+    def _node_section(node_result: NodeMappingResult) -> Iterator[str]:
+        """Yield the custom node installation lines."""
+        yield from NODES_HEADER
 
         if node_result.required_packs:
-            lines.append("")
-            lines.append("# Install custom nodes required by the workflow")
+            yield ""
+            yield "# Install custom nodes required by the workflow"
 
             for pack in node_result.required_packs:
-                lines.append("")
-                lines.append(f"# --- {pack.name} ---")
+                yield ""
+                yield f"# --- {pack.name} ---"
 
                 if pack.install_method == "comfy_cli":
-                    lines.append(f"RUN {pack.install_command}")
+                    yield f"RUN {pack.install_command}"
                 else:
                     # Git clone installation
-                    lines.append(f"RUN cd /comfyui/custom_nodes && {pack.install_command}")
+                    yield f"RUN cd /comfyui/custom_nodes && {pack.install_command}"
                     if pack.has_requirements:
-                        lines.append(
+                        yield (
                             f"RUN cd /comfyui/custom_nodes/{pack.name} && "
                             f"pip install -r requirements.txt"
                         )
         else:
-            lines.append("# No custom nodes required")
+            yield "# No custom nodes required"
 
         # Unresolved nodes section
         if node_result.unresolved:
-            lines.append("")
-            lines.append("# ============================================================================")
-            lines.append("# UNRESOLVED NODES - Manual installation required")
-            lines.append("# ============================================================================")
-            lines.append("# The following nodes could not be automatically resolved:")
+            yield from UNRESOLVED_NODES_HEADER
             for node in node_result.unresolved:
-                lines.append(f"# - {node}")
-            lines.append("# Please add installation commands manually or update the node registry.")
+                yield f"# - {node}"
+            yield "# Please add installation commands manually or update the node registry."
 
-        lines.append("")
+        yield ""
 
-        # Model downloads section
-        lines.append("# ============================================================================")
-        lines.append("# Model Downloads")
-        lines.append("# ============================================================================")
+    @staticmethod
+    def _model_section(model_result: ModelLookupResult, config: GenerationConfig) -> Iterator[str]:
+        """Yield the model download lines."""
+        yield from MODELS_HEADER
 
         if model_result.resolved:
-            lines.append("")
-            lines.append("# Download models required by the workflow")
-
-            for filename, model in model_result.resolved.items():
-                url = model.url
-                relative_path = model.relative_path
-
-                # Use comfy model download for HuggingFace models
-                if model.source == "huggingface" or "huggingface.co" in url:
-                    lines.append(
-                        f"RUN comfy model download "
-                        f"--url {url} "
-                        f"--relative-path {relative_path} "
-                        f"--filename {filename}"
-                    )
-                elif model.source == "github" or "github.com" in url:
-                    # For GitHub releases, use wget
-                    lines.append(
-                        f"RUN mkdir -p /comfyui/{relative_path} && "
-                        f"wget -q -O /comfyui/{relative_path}/{filename} {url}"
-                    )
-                else:
-                    lines.append(
-                        f"RUN comfy model download "
-                        f"--url {url} "
-                        f"--relative-path {relative_path} "
-                        f"--filename {filename}"
-                    )
+            yield ""
+            yield "# Download models required by the workflow"
+            yield from DockerfileGenerator._model_downloads(model_result, config)
         else:
-            lines.append("# No models to download")
+            yield "# No models to download"
 
         # Unresolved models section
         if model_result.unresolved:
-            lines.append("")
-            lines.append("# ============================================================================")
-            lines.append("# UNRESOLVED MODELS - Manual download required")
-            lines.append("# ============================================================================")
-            lines.append("# The following models could not be automatically resolved:")
+            yield from UNRESOLVED_MODELS_HEADER
             for model in model_result.unresolved:
-                lines.append(f"# RUN # Could not find URL for {model}")
-            lines.append("# Please add download commands manually or update the model registry.")
-
-        # Input copy section
-        if config.include_input_copy:
-            lines.append("")
-            lines.append("# ============================================================================")
-            lines.append("# Input Files")
-            lines.append("# ============================================================================")
-            lines.append("# Copy input files (images/videos) into ComfyUI")
-            lines.append("COPY input/ /comfyui/input/")
-
-        # Finalize section
-        lines.append("")
-        lines.append("# ============================================================================")
-        lines.append("# Finalize")
-        lines.append("# ============================================================================")
-        lines.append("# Ensure proper permissions")
-        lines.append("RUN chmod -R 755 /comfyui/custom_nodes")
-        lines.append("")
-        lines.append("# Set working directory")
-        lines.append("WORKDIR /comfyui")
-
-        return '\n'.join(lines)
+                yield f"# RUN # Could not find URL for {model}"
+            yield "# Please add download commands manually or update the model registry."
+
+    @staticmethod
+    def _model_downloads(model_result: ModelLookupResult, config: GenerationConfig) -> list[str]:
+        """Return the RUN instructions that download the resolved models."""
+        downloads = []  # (uses_wget, command), in lookup order
+        for filename, model in model_result.resolved.items():
+            url = model.url
+            relative_path = model.relative_path
+
+            is_huggingface = model.source == "huggingface" or "huggingface.co" in url
+            if not is_huggingface and (model.source == "github" or "github.com" in url):
+                # For GitHub releases, use wget
+                command = (
+                    f"mkdir -p /comfyui/{relative_path} && "
+                    f"wget -q -O /comfyui/{relative_path}/{filename} {url}"
+                )
+                downloads.append((True, command))
+            else:
+                # HuggingFace and everything else go through comfy model download
+                command = (
+                    f"comfy model download "
+                    f"--url {url} "
+                    f"--relative-path {relative_path} "
+                    f"--filename {filename}"
+                )
+                downloads.append((False, command))
+
+        if not config.one_layer_downloads:
+            return [f"RUN {command}" for _, command in downloads]
+
+        # One RUN (and image layer) per download tool
+        runs = []
+        for uses_wget in (False, True):
+            commands = [command for wget, command in downloads if wget is uses_wget]
+            if commands:
+                runs.append("RUN " + " && \\\n    ".join(commands))
+        return runs
+
+    @staticmethod
+    def _input_section(config: GenerationConfig) -> tuple[str, ...]:
+        """Return the input copy lines, if enabled."""
+        return INPUT_COPY_SECTION if config.include_input_copy else ()
 
     def _generate_docker_compose(self,
                                  analysis: WorkflowAnalysis,
                                  config: GenerationConfig,
-                                 workflow_name: str) -> str:
+                                 workflow_name: str,
+                                 timestamp: str) -> str:
         """Generate docker-compose.yml content."""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        container_name = config.container_name or workflow_name.lower().replace(" ", "-").replace("(", "").replace(")", "")
+        container_name = self._container_name(config, workflow_name)
 
         return f"""# ============================================================================
 # XiCON Serverless RunPod - Local Development Compose
@@ -361,25 +676,10 @@ services:
                          node_result: NodeMappingResult,
                          model_result: ModelLookupResult,
                          config: GenerationConfig,
-                         workflow_name: str) -> str:
+                         workflow_name: str,
+                         timestamp: str) -> str:
         """Generate README.md content."""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        # Determine input/output types
-        input_types = []
-        if analysis.has_video_input:
-            input_types.append("video")
-        if analysis.has_image_input:
-            input_types.append("image")
-
-        output_types = []
-        if analysis.has_video_output:
-            output_types.append("video")
-        if analysis.has_image_output:
-            output_types.append("image")
-
-        input_type = " + ".join(input_types) if input_types else "none"
-        output_type = " + ".join(output_types) if output_types else "none"
+        input_type, output_type = self._io_types(analysis)
 
         # Build custom nodes section
         nodes_section = ""
@@ -400,12 +700,11 @@ services:
             unresolved_nodes_section = "\n".join(unresolved_lines)
 
         # Build models section
-        models_lines = []
-        for filename, model in model_result.resolved.items():
-            models_lines.append(f"- **{filename}** ({model.size_gb:.1f} GB)")
-            models_lines.append(f"  - Path: `{model.relative_path}`")
-            models_lines.append(f"  - URL: {model.url}")
-        models_section = "\n".join(models_lines) if models_lines else "No models required."
+        models_section = "\n".join(
+            README_MODEL_ENTRY.format(filename=filename, size_gb=model.size_gb,
+                                      relative_path=model.relative_path, url=model.url)
+            for filename, model in model_result.resolved.items()
+        ) or "No models required."
 
         # Build unresolved models section
         unresolved_models_section = ""
@@ -415,126 +714,21 @@ services:
                 unresolved_lines.append(f"- {model}")
             unresolved_models_section = "\n".join(unresolved_lines)
 
-        return f"""# {workflow_name} - RunPod Serverless Endpoint
-
-Generated by XiCON Serverless RunPod Automation System
-
-## Overview
-
-- **Workflow**: {workflow_name}
-- **Generated**: {timestamp}
-- **Input Type**: {input_type}
-- **Output Type**: {output_type}
-
-## Requirements
-
-- Docker with NVIDIA GPU support
-- NVIDIA Container Toolkit
-- ~{model_result.total_size_gb:.1f} GB disk space for models
-
-## Quick Start
-
-### Local Development
-
-1. **Build and run with Docker Compose**:
-```bash
-docker-compose up --build
-```
-
-2. **Access ComfyUI**: Open http://localhost:8188
-
-3. **Load the workflow**: Use the workflow JSON file
-
-### RunPod Deployment
-
-1. **Push to GitHub** (recommended):
-```bash
-git init
-git add .
-git commit -m "Initial commit"
-git remote add origin https://github.com/your-username/your-repo.git
-git push -u origin main
-```
-
-2. **Create RunPod Endpoint**:
-   - Go to [RunPod Serverless](https://runpod.io/console/serverless)
-   - Create new endpoint
-   - Select "Custom Source" and enter your GitHub repo URL
-   - Configure GPU type (recommended: A100/A40 for video generation)
-
-3. **API Usage**:
-```bash
-curl -X POST "https://api.runpod.ai/v2/${{ENDPOINT_ID}}/run" \\
-  -H "Authorization: Bearer ${{RUNPOD_API_KEY}}" \\
-  -H "Content-Type: application/json" \\
-  -d '{{
-    "input": {{
-      "workflow": <your-workflow-json>,
-      "images": [
-        {{
-          "name": "input_image.jpg",
-          "image": "<base64-encoded-image>"
-        }}
-      ]
-    }}
-  }}'
-```
-
-## Custom Nodes Used
-
-{nodes_section}
-
-{unresolved_nodes_section}
-
-## Models
-
-{models_section}
-
-{unresolved_models_section}
-
-## Input/Output
-
-### Input
-{"- Reference image (JPEG/PNG)" if analysis.has_image_input else ""}
-{"- Source video (MP4, any length)" if analysis.has_video_input else ""}
-
-### Output
-{"- Generated video (MP4/H264)" if analysis.has_video_output else ""}
-{"- Generated images (PNG)" if analysis.has_image_output else ""}
-
-## Troubleshooting
-
-### Build Failures
-
-1. **Custom node installation fails**:
-   - Check if the GitHub repo exists and is accessible
-   - Some nodes may have additional dependencies
-
-2. **Model download fails**:
-   - Verify the HuggingFace URL is correct
-   - Some models may require authentication
-
-### Runtime Issues
-
-1. **Out of Memory**:
-   - Use a GPU with more VRAM (24GB+ recommended for video)
-   - Enable model offloading in the workflow
-
-2. **Slow Generation**:
-   - Check GPU utilization
-   - Consider using FP8 or FP16 models
-
-## License
-
-This generated configuration is provided as-is. Please check the licenses of:
-- Individual custom nodes
-- Model files
-- ComfyUI itself
-
----
-
-Generated with [XiCON Serverless RunPod Automation](https://github.com/your-repo)
-"""
+        return README_TEMPLATE.substitute(
+            workflow_name=workflow_name,
+            timestamp=timestamp,
+            input_type=input_type,
+            output_type=output_type,
+            total_size_gb=f"{model_result.total_size_gb:.1f}",
+            nodes_section=nodes_section,
+            unresolved_nodes_section=unresolved_nodes_section,
+            models_section=models_section,
+            unresolved_models_section=unresolved_models_section,
+            image_input_line="- Reference image (JPEG/PNG)" if analysis.has_image_input else "",
+            video_input_line="- Source video (MP4, any length)" if analysis.has_video_input else "",
+            video_output_line="- Generated video (MP4/H264)" if analysis.has_video_output else "",
+            image_output_line="- Generated images (PNG)" if analysis.has_image_output else "",
+        )
 
 
 def main():
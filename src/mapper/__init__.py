@@ -2,5 +2,6 @@
 
 from .node_mapper import NodeMapper
 from .model_finder import ModelFinder
+from .registry_cache import clear_registry_cache
 
-__all__ = ["NodeMapper", "ModelFinder"]
+__all__ = ["NodeMapper", "ModelFinder", "clear_registry_cache"]
@@ -5,18 +5,21 @@ Looks up model file URLs from the registry and provides
 fallback search functionality for HuggingFace.
 """
 
-import json
+import copy
+from functools import lru_cache
 from pathlib import Path
 from dataclasses import dataclass, field
 from typing import Optional
 
+from .registry_cache import load_registry, save_registry
 
-@dataclass
+
+@dataclass(slots=True)
 class ModelInfo:
     """Information about a model file."""
     filename: str
-    url: str
-    relative_path: str
+    url: str = ""
+    relative_path: str = ""
     size_gb: float = 0.0
     description: str = ""
     source: str = "unknown"
@@ -24,7 +27,32 @@ class ModelInfo:
     note: Optional[str] = None
 
 
-@dataclass
+# ModelInfo fields that are read from registry rows
+_INFO_FIELDS = ("url", "relative_path", "size_gb", "description", "source", "alternatives", "note")
+
+# Path inference rules for _infer_path, checked in order (first match wins)
+_PATH_BY_EXT = ((".onnx", "models/onnx"), (".torchscript", "models/checkpoints"))
+_PATH_BY_TOKEN = (
+    ("vae", "models/vae"),
+    ("lora", "models/loras"),
+    ("clip", "models/clip_vision"),
+    ("text_encoder", "models/text_encoders"),
+    ("umt5", "models/text_encoders"),
+    ("diffusion", "models/diffusion_models"),
+)
+
+
+def _url_basename(url: str) -> str:
+    """Return the last path segment of a URL, without query string."""
+    return url.rstrip("/").rsplit("/", 1)[-1].split("?", 1)[0]
+
+
+def _normalize_url(url: str) -> str:
+    """Return a URL without query string, fragment or trailing slash."""
+    return url.split("#", 1)[0].split("?", 1)[0].rstrip("/")
+
+
+@dataclass(slots=True)
 class ModelLookupResult:
     """Result of looking up models."""
     resolved: dict[str, ModelInfo]  # filename -> ModelInfo
@@ -53,53 +81,89 @@ class ModelFinder:
         if not self.registry_path.exists():
             raise FileNotFoundError(f"Model registry not found: {self.registry_path}")
 
-        with open(self.registry_path, 'r', encoding='utf-8') as f:
-            self.registry = json.load(f)
+        # Parsed registries are shared across instances until first modified
+        self.registry = load_registry(self.registry_path)
+        self._registry_shared = True
+        self._saved_digest = None
+        self._dirty = False
+        self._index_registry()
 
+    def _index_registry(self):
+        """Build lookup tables from the loaded registry."""
         self.models = self.registry.get("models", {})
         self.model_paths = self.registry.get("model_paths", {})
+        # Registry rows reduced to ModelInfo fields, so lookups can splat them
+        self._info_rows = {
+            filename: self._info_row(model_data) for filename, model_data in self.models.items()
+        }
+
+        # Each registered download URL (normalized) -> registry key. Keyed on
+        # the whole URL: unrelated repos often share basenames such as
+        # diffusion_pytorch_model.safetensors
+        self._url_index = {
+            _normalize_url(model_data["url"]): filename
+            for filename, model_data in self.models.items() if model_data.get("url")
+        }
+
+    @staticmethod
+    def _info_row(model_data: dict) -> dict:
+        """Keep only the registry keys that map onto ModelInfo fields."""
+        return {key: model_data[key] for key in _INFO_FIELDS if key in model_data}
+
+    def _own_registry(self):
+        """Replace the shared cached registry with a private copy before modifying it."""
+        if self._registry_shared:
+            self.registry = copy.deepcopy(self.registry)
+            self._registry_shared = False
+            # Make models the registry's own dict, so edits through it land
+            # in the saved registry
+            self.registry.setdefault("models", {})
+            self._index_registry()
 
     def lookup(self, filenames: list[str] | set[str]) -> ModelLookupResult:
         """
         Look up download URLs for model files.
 
         Args:
-            filenames: List or set of model filenames (can also be URLs)
+            filenames: List or set of model filenames (can also be URLs).
+                Duplicates are looked up, and counted in the total size, once.
 
         Returns:
             ModelLookupResult with resolved and unresolved models
         """
+        if not filenames:
+            return ModelLookupResult(resolved={}, unresolved=[], total_size_gb=0.0)
+
+        info_rows = self._info_rows
+        url_index = self._url_index
         resolved = {}
         unresolved = []
         total_size = 0.0
 
-        for filename in filenames:
-            # Handle URL-based references (extract filename from URL)
-            original_ref = filename
-            if filename.startswith("http://") or filename.startswith("https://"):
-                # Extract filename from URL
-                filename = filename.rstrip("/").split("/")[-1]
-
-            if filename in self.models:
-                model_data = self.models[filename]
-                model_info = ModelInfo(
-                    filename=filename,
-                    url=model_data.get("url", ""),
-                    relative_path=model_data.get("relative_path", ""),
-                    size_gb=model_data.get("size_gb", 0.0),
-                    description=model_data.get("description", ""),
-                    source=model_data.get("source", "unknown"),
-                    alternatives=model_data.get("alternatives", []),
-                    note=model_data.get("note")
-                )
-                resolved[filename] = model_info
-                total_size += model_info.size_gb
-            else:
+        # Workflows often reference the same model from several nodes
+        for filename in dict.fromkeys(filenames):
+            row = info_rows.get(filename)
+            if row is None and "://" in filename:
+                # URL-based reference: match a registered download URL, or
+                # else use its basename as the registry key
+                key = url_index.get(_normalize_url(filename))
+                if key is not None:
+                    filename = key
+                else:
+                    filename = _url_basename(filename)
+                row = info_rows.get(filename)
+            if row is None:
                 unresolved.append(filename)
+                continue
+            if filename in resolved:
+                continue
+            model_info = resolved[filename] = ModelInfo(filename=filename, **row)
+            total_size += model_info.size_gb
 
+        unresolved.sort()
         return ModelLookupResult(
             resolved=resolved,
-            unresolved=sorted(unresolved),
+            unresolved=unresolved,
             total_size_gb=total_size
         )
 
@@ -119,8 +183,10 @@ class ModelFinder:
             size_gb: Model size in GB
             description: Model description
             source: Source type (huggingface, github, civitai)
-            save: Whether to save changes to file
+            save: Whether to save changes to file now (otherwise call flush() later)
         """
+        self._own_registry()
+
         if relative_path is None:
             relative_path = self._infer_path(filename)
 
@@ -132,37 +198,47 @@ class ModelFinder:
             "source": source
         }
 
+        previous = self.models.get(filename)
+        if previous and previous.get("url"):
+            previous_url = _normalize_url(previous["url"])
+            if self._url_index.get(previous_url) == filename:
+                del self._url_index[previous_url]
+
         self.models[filename] = model_data
-        self.registry["models"][filename] = model_data
+        self._info_rows[filename] = self._info_row(model_data)
+        self._url_index[_normalize_url(url)] = filename
 
+        self._dirty = True
         if save:
             self._save_registry()
 
     def _infer_path(self, filename: str) -> str:
         """Infer the model path from filename extension."""
+        return self._infer_path_static(filename)
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _infer_path_static(filename: str) -> str:
+        """Cached filename -> relative path inference behind _infer_path."""
         filename_lower = filename.lower()
 
-        if filename_lower.endswith(".onnx"):
-            return "models/onnx"
-        elif filename_lower.endswith(".torchscript"):
-            return "models/checkpoints"
-        elif "vae" in filename_lower:
-            return "models/vae"
-        elif "lora" in filename_lower:
-            return "models/loras"
-        elif "clip" in filename_lower:
-            return "models/clip_vision"
-        elif "text_encoder" in filename_lower or "umt5" in filename_lower:
-            return "models/text_encoders"
-        elif "diffusion" in filename_lower:
-            return "models/diffusion_models"
-        else:
-            return "models/checkpoints"
+        for ext, path in _PATH_BY_EXT:
+            if filename_lower.endswith(ext):
+                return path
+        for token, path in _PATH_BY_TOKEN:
+            if token in filename_lower:
+                return path
+        return "models/checkpoints"
 
     def _save_registry(self):
-        """Save the registry back to JSON file."""
-        with open(self.registry_path, 'w', encoding='utf-8') as f:
-            json.dump(self.registry, f, indent=2, ensure_ascii=False)
+        """Save the registry back to JSON file (only rewritten if its content changed)."""
+        self._saved_digest = save_registry(self.registry_path, self.registry, self._saved_digest)
+        self._dirty = False
+
+    def flush(self):
+        """Save pending changes from calls made with save=False."""
+        if self._dirty:
+            self._save_registry()
 
     def get_download_commands(self, result: ModelLookupResult) -> list[str]:
         """
@@ -241,24 +317,26 @@ def main():
     filenames = sys.argv[1:]
     result = finder.lookup(filenames)
 
-    print(f"\n=== Model Lookup Results ===\n")
+    out = [f"\n=== Model Lookup Results ===\n"]
 
     if result.resolved:
-        print(f"Resolved models ({len(result.resolved)}):")
+        out.append(f"Resolved models ({len(result.resolved)}):")
         for filename, model in result.resolved.items():
-            print(f"\n  {filename}")
-            print(f"    URL: {model.url}")
-            print(f"    Path: {model.relative_path}")
-            print(f"    Size: {model.size_gb:.2f} GB")
+            out.append(f"\n  {filename}")
+            out.append(f"    URL: {model.url}")
+            out.append(f"    Path: {model.relative_path}")
+            out.append(f"    Size: {model.size_gb:.2f} GB")
             if model.description:
-                print(f"    Description: {model.description}")
+                out.append(f"    Description: {model.description}")
 
     if result.unresolved:
-        print(f"\nUnresolved models ({len(result.unresolved)}):")
+        out.append(f"\nUnresolved models ({len(result.unresolved)}):")
         for filename in result.unresolved:
-            print(f"  - {filename}")
+            out.append(f"  - {filename}")
+
+    out.append(f"\nTotal size: {result.total_size_gb:.2f} GB")
 
-    print(f"\nTotal size: {result.total_size_gb:.2f} GB")
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 if __name__ == "__main__":
@@ -5,25 +5,34 @@ Maps ComfyUI node class_types to their GitHub repositories
 and installation commands using the node registry.
 """
 
-import json
+import copy
+import sys
 from pathlib import Path
-from dataclasses import dataclass, field
+from dataclasses import dataclass
+from functools import cached_property
+from operator import attrgetter
 from typing import Optional
 
+from .registry_cache import load_registry, save_registry
 
-@dataclass
+
+# _node_targets value for built-in ComfyUI nodes
+_BUILTIN = "builtin"
+
+
+@dataclass(slots=True, frozen=True)
 class NodePackInfo:
-    """Information about a custom node pack."""
+    """Information about a custom node pack (shared between results, so immutable)."""
     name: str
     repo: str
     install_method: str
     install_command: str
     has_requirements: bool = False
-    dependencies: list[str] = field(default_factory=list)
-    system_dependencies: list[str] = field(default_factory=list)
+    dependencies: tuple[str, ...] = ()
+    system_dependencies: tuple[str, ...] = ()
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class NodeMappingResult:
     """Result of mapping nodes to their repositories."""
     resolved: dict[str, NodePackInfo]  # node_type -> NodePackInfo
@@ -54,78 +63,134 @@ class NodeMapper:
         if not self.registry_path.exists():
             raise FileNotFoundError(f"Node registry not found: {self.registry_path}")
 
-        with open(self.registry_path, 'r', encoding='utf-8') as f:
-            self.registry = json.load(f)
-
-        # Build lookup tables
+        # Parsed registries are shared across instances until first modified
+        self.registry = load_registry(self.registry_path)
+        self._registry_shared = True
+        self._saved_digest = None
+        self._dirty = False
+        self._index_registry()
+        # Edits go through node_to_pack, so it must alias the registry's dict
+        assert self.node_to_pack is self.registry.get("node_to_pack", self.node_to_pack)
+
+    def _index_registry(self):
+        """Build lookup tables from the loaded registry."""
         self.node_to_pack = self.registry.get("node_to_pack", {})
         self.node_packs = self.registry.get("node_packs", {})
-        self.builtin_nodes = set(self.registry.get("builtin_nodes", {}).get("nodes", []))
+        # Read-only after load; registry edits go through add_node_mapping
+        self.builtin_nodes = frozenset(map(sys.intern, self.registry.get("builtin_nodes", {}).get("nodes", [])))
+        # pack_name -> set mirroring that pack's "nodes" list, filled in by
+        # add_node_mapping so repeated adds to one pack avoid list scans
+        self._pack_node_sets = {}
+        self._drop_indexes()
+
+    # The indexes below are only needed by map_nodes, so they are built on
+    # first use; commands that just list or edit the registry skip them.
+    # Keys and pack names are interned, so they share one object with every
+    # other interned copy and compare by identity first.
+
+    @cached_property
+    def _pack_infos(self) -> dict[str, NodePackInfo]:
+        """One shared NodePackInfo per pack, handed out by map_nodes."""
+        intern = sys.intern
+        return {
+            intern(pack_name): self._pack_info(intern(pack_name), pack_data)
+            for pack_name, pack_data in self.node_packs.items()
+        }
+
+    @cached_property
+    def _node_targets(self) -> dict[str, NodePackInfo | str]:
+        """node_type -> NodePackInfo or _BUILTIN, so map_nodes needs one probe per node."""
+        intern = sys.intern
+        node_targets = {}
+        # Insert grouped by pack, so one pack's nodes sit next to each other in the table
+        by_pack = sorted(self.node_to_pack.items(), key=lambda item: str(item[1]))
+        for node_type, pack_name in by_pack:
+            target = self._target_for(pack_name)
+            if target is not None:
+                node_targets[intern(node_type)] = target
+        node_targets.update(dict.fromkeys(self.builtin_nodes, _BUILTIN))
+        return node_targets
+
+    def _drop_indexes(self):
+        """Discard the lazily built indexes after the registry changes."""
+        self.__dict__.pop("_pack_infos", None)
+        self.__dict__.pop("_node_targets", None)
+
+    def _target_for(self, pack_name: Optional[str]) -> NodePackInfo | str | None:
+        """Resolve a node_to_pack value to a NodePackInfo, _BUILTIN, or None if unknown."""
+        if pack_name == _BUILTIN:
+            return _BUILTIN
+        return self._pack_infos.get(pack_name) if pack_name else None
+
+    @staticmethod
+    def _pack_info(pack_name: str, pack_data: dict) -> NodePackInfo:
+        """Build the NodePackInfo for a registry pack entry."""
+        return NodePackInfo(
+            name=pack_name,
+            repo=pack_data.get("repo", ""),
+            install_method=pack_data.get("install_method", "git_clone"),
+            install_command=pack_data.get("install_command", ""),
+            has_requirements=pack_data.get("has_requirements", False),
+            dependencies=tuple(pack_data.get("dependencies", ())),
+            system_dependencies=tuple(pack_data.get("system_dependencies", ()))
+        )
 
-    def map_nodes(self, node_types: list[str] | set[str]) -> NodeMappingResult:
+    def _own_registry(self):
+        """Replace the shared cached registry with a private copy before modifying it."""
+        if self._registry_shared:
+            self.registry = copy.deepcopy(self.registry)
+            self._registry_shared = False
+            # Make node_to_pack / node_packs the registry's own dicts, so edits
+            # through them land in the saved registry
+            self.registry.setdefault("node_to_pack", {})
+            self.registry.setdefault("node_packs", {})
+            self._index_registry()
+
+    def map_nodes(self, node_types: list[str] | set[str], sort: bool = True) -> NodeMappingResult:
         """
         Map a list of node types to their repositories.
 
         Args:
-            node_types: List or set of node class_type strings
+            node_types: List or set of node class_type strings. Duplicates
+                are mapped, and reported, once.
+            sort: Sort the result lists by name for consistent output. Pass False
+                to keep input order when the caller does not need it sorted.
 
         Returns:
             NodeMappingResult with resolved, unresolved, and builtin nodes
         """
+        if not isinstance(node_types, (set, frozenset)):
+            # Keeps first-seen order for sort=False
+            node_types = dict.fromkeys(node_types)
+
+        node_targets = self._node_targets
         resolved = {}
         unresolved = []
         builtin = []
-        seen_packs = set()
+        seen_packs = {}
 
         for node_type in node_types:
-            if node_type in self.builtin_nodes:
-                builtin.append(node_type)
-                continue
-
-            pack_name = self.node_to_pack.get(node_type)
-
-            if pack_name == "builtin":
-                builtin.append(node_type)
-                continue
-
-            if pack_name and pack_name in self.node_packs:
-                pack_data = self.node_packs[pack_name]
-                pack_info = NodePackInfo(
-                    name=pack_name,
-                    repo=pack_data.get("repo", ""),
-                    install_method=pack_data.get("install_method", "git_clone"),
-                    install_command=pack_data.get("install_command", ""),
-                    has_requirements=pack_data.get("has_requirements", False),
-                    dependencies=pack_data.get("dependencies", []),
-                    system_dependencies=pack_data.get("system_dependencies", [])
-                )
-                resolved[node_type] = pack_info
-                seen_packs.add(pack_name)
-            else:
+            target = node_targets.get(node_type)
+            if target is None:
                 unresolved.append(node_type)
+            elif isinstance(target, NodePackInfo):
+                resolved[node_type] = target
+                seen_packs[target.name] = target
+            else:
+                builtin.append(node_type)
 
         # Build unique required packs list
-        required_packs = []
-        for pack_name in seen_packs:
-            pack_data = self.node_packs[pack_name]
-            pack_info = NodePackInfo(
-                name=pack_name,
-                repo=pack_data.get("repo", ""),
-                install_method=pack_data.get("install_method", "git_clone"),
-                install_command=pack_data.get("install_command", ""),
-                has_requirements=pack_data.get("has_requirements", False),
-                dependencies=pack_data.get("dependencies", []),
-                system_dependencies=pack_data.get("system_dependencies", [])
-            )
-            required_packs.append(pack_info)
-
-        # Sort packs by name for consistent output
-        required_packs.sort(key=lambda p: p.name)
+        required_packs = list(seen_packs.values())
+
+        if sort:
+            required_packs.sort(key=attrgetter("name"))
+            unresolved.sort()
+            builtin.sort()
 
         return NodeMappingResult(
             resolved=resolved,
-            unresolved=sorted(unresolved),
-            builtin=sorted(builtin),
+            unresolved=unresolved,
+            builtin=builtin,
             required_packs=required_packs
         )
 
@@ -144,11 +209,13 @@ class NodeMapper:
             install_method: "git_clone" or "comfy_cli"
             install_command: Custom install command (auto-generated if None)
             has_requirements: Whether the pack has requirements.txt
-            save: Whether to save changes to file
+            save: Whether to save changes to file now (otherwise call flush() later)
         """
+        self._own_registry()
+        # node_to_pack and node_packs are the registry's own dicts from here on
+
         # Add to node_to_pack mapping
         self.node_to_pack[node_type] = pack_name
-        self.registry["node_to_pack"][node_type] = pack_name
 
         # Add or update pack info if not exists
         if pack_name not in self.node_packs:
@@ -166,22 +233,31 @@ class NodeMapper:
                 "nodes": [node_type]
             }
             self.node_packs[pack_name] = pack_data
-            self.registry["node_packs"][pack_name] = pack_data
+            self._pack_node_sets[pack_name] = {node_type}
         else:
             # Add node to existing pack if not already there
-            if "nodes" not in self.node_packs[pack_name]:
-                self.node_packs[pack_name]["nodes"] = []
-            if node_type not in self.node_packs[pack_name]["nodes"]:
-                self.node_packs[pack_name]["nodes"].append(node_type)
-                self.registry["node_packs"][pack_name]["nodes"].append(node_type)
-
+            pack_nodes = self.node_packs[pack_name].setdefault("nodes", [])
+            node_set = self._pack_node_sets.get(pack_name)
+            if node_set is None:
+                node_set = self._pack_node_sets[pack_name] = set(pack_nodes)
+            if node_type not in node_set:
+                node_set.add(node_type)
+                pack_nodes.append(node_type)
+
+        self._drop_indexes()
+        self._dirty = True
         if save:
             self._save_registry()
 
     def _save_registry(self):
-        """Save the registry back to JSON file."""
-        with open(self.registry_path, 'w', encoding='utf-8') as f:
-            json.dump(self.registry, f, indent=2, ensure_ascii=False)
+        """Save the registry back to JSON file (only rewritten if its content changed)."""
+        self._saved_digest = save_registry(self.registry_path, self.registry, self._saved_digest)
+        self._dirty = False
+
+    def flush(self):
+        """Save pending changes from calls made with save=False."""
+        if self._dirty:
+            self._save_registry()
 
     def get_install_commands(self, result: NodeMappingResult) -> list[str]:
         """
@@ -194,27 +270,26 @@ class NodeMapper:
             List of shell commands for installation
         """
         commands = []
+        append = commands.append
+        extend = commands.extend
 
         for pack in result.required_packs:
             if pack.install_method == "comfy_cli":
-                commands.append(f"RUN {pack.install_command}")
+                append(f"RUN {pack.install_command}")
             else:
                 # Git clone installation
-                commands.append(f"# Install {pack.name}")
-                commands.append(f"RUN cd /comfyui/custom_nodes && {pack.install_command}")
+                extend((
+                    f"# Install {pack.name}",
+                    f"RUN cd /comfyui/custom_nodes && {pack.install_command}",
+                ))
                 if pack.has_requirements:
-                    commands.append(
-                        f"RUN cd /comfyui/custom_nodes/{pack.name} && "
-                        f"pip install -r requirements.txt"
-                    )
+                    append(f"RUN cd /comfyui/custom_nodes/{pack.name} && pip install -r requirements.txt")
 
         return commands
 
 
 def main():
     """CLI entry point for testing."""
-    import sys
-
     mapper = NodeMapper()
 
     if len(sys.argv) < 2:
@@ -225,30 +300,32 @@ def main():
     node_types = sys.argv[1:]
     result = mapper.map_nodes(node_types)
 
-    print(f"\n=== Node Mapping Results ===\n")
+    out = [f"\n=== Node Mapping Results ===\n"]
 
     if result.builtin:
-        print(f"Built-in nodes ({len(result.builtin)}):")
+        out.append(f"Built-in nodes ({len(result.builtin)}):")
         for node in result.builtin:
-            print(f"  - {node}")
+            out.append(f"  - {node}")
 
     if result.resolved:
-        print(f"\nResolved nodes ({len(result.resolved)}):")
+        out.append(f"\nResolved nodes ({len(result.resolved)}):")
         for node, pack in result.resolved.items():
-            print(f"  - {node}")
-            print(f"      Pack: {pack.name}")
-            print(f"      Repo: {pack.repo}")
+            out.append(f"  - {node}")
+            out.append(f"      Pack: {pack.name}")
+            out.append(f"      Repo: {pack.repo}")
 
     if result.unresolved:
-        print(f"\nUnresolved nodes ({len(result.unresolved)}):")
+        out.append(f"\nUnresolved nodes ({len(result.unresolved)}):")
         for node in result.unresolved:
-            print(f"  - {node}")
+            out.append(f"  - {node}")
 
     if result.required_packs:
-        print(f"\nRequired Node Packs ({len(result.required_packs)}):")
+        out.append(f"\nRequired Node Packs ({len(result.required_packs)}):")
         for pack in result.required_packs:
-            print(f"  - {pack.name}")
-            print(f"      Install: {pack.install_command}")
+            out.append(f"  - {pack.name}")
+            out.append(f"      Install: {pack.install_command}")
+
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 if __name__ == "__main__":
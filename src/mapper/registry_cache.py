@@ -0,0 +1,121 @@
+"""
+Registry Cache Module
+
+Shares parsed registry JSON between NodeMapper and ModelFinder instances,
+keyed by file path and modification time, and writes registries back to disk.
+Parsed registries are also pickled to a per-user cache, so later processes
+(e.g. each CLI invocation) can skip the JSON parse while the file is unchanged.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:  # orjson not installed; fall back to the stdlib codec
+    orjson = None
+
+# Pickled registries, keyed by absolute path, mtime and size.
+# Bump _CACHE_VERSION whenever the cached structure changes.
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "xicon" / "registries"
+_CACHE_VERSION = 1
+
+
+@lru_cache(maxsize=8)
+def _load_registry_cached(path_str: str, mtime_ns: int, size: int) -> dict:
+    """Parse a registry file, reusing the on-disk pickle when still valid."""
+    key = (_CACHE_VERSION, os.path.abspath(path_str), mtime_ns, size)
+    cache_file = CACHE_DIR / (hashlib.sha1(key[1].encode()).hexdigest() + ".pkl")
+
+    try:
+        with open(cache_file, "rb") as f:
+            cached_key, registry = pickle.load(f)
+        if cached_key == key:
+            return registry
+    except Exception:
+        pass  # missing, stale or unreadable cache entry
+
+    data = Path(path_str).read_bytes()
+    if orjson is not None:
+        registry = orjson.loads(data)
+    else:
+        registry = json.loads(data)
+
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, "wb") as f:
+            pickle.dump((key, registry), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass  # caching is best-effort
+
+    return registry
+
+
+def load_registry(registry_path: Path) -> dict:
+    """
+    Load a registry JSON file, reusing the parsed dict while the file is unchanged.
+
+    The returned dict is shared between callers and must be copied before
+    it is modified.
+
+    Args:
+        registry_path: Path to the registry JSON file
+
+    Returns:
+        Parsed registry dict
+    """
+    stat = registry_path.stat()
+    return _load_registry_cached(str(registry_path), stat.st_mtime_ns, stat.st_size)
+
+
+def clear_registry_cache():
+    """Drop all cached registries (e.g. after editing a file within one mtime tick)."""
+    _load_registry_cached.cache_clear()
+    for cache_file in CACHE_DIR.glob("*.pkl"):
+        try:
+            cache_file.unlink()
+        except OSError:
+            pass
+
+
+def save_registry(registry_path: Path, registry: dict, last_digest: Optional[bytes] = None) -> bytes:
+    """
+    Write a registry JSON file atomically, skipping the write if nothing changed.
+
+    The new content is compared against ``last_digest`` (the digest returned by
+    the previous save) or, on the first save, against the file on disk.
+
+    Args:
+        registry_path: Path to the registry JSON file
+        registry: Registry dict to serialize
+        last_digest: Digest returned by the previous call for this file, if any
+
+    Returns:
+        Digest of the content now on disk
+    """
+    if orjson is not None:
+        # OPT_NON_STR_KEYS stringifies non-str keys like the json fallback does
+        data = orjson.dumps(registry, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    else:
+        data = json.dumps(registry, indent=2, ensure_ascii=False).encode('utf-8')
+    digest = hashlib.blake2b(data, digest_size=16).digest()
+
+    if last_digest is None and registry_path.exists():
+        last_digest = hashlib.blake2b(registry_path.read_bytes(), digest_size=16).digest()
+    if digest == last_digest:
+        return digest
+
+    # Per-process temp name, so concurrent saves never share a partial file.
+    # The new mtime/size also invalidates the pickled copy in CACHE_DIR
+    tmp_path = registry_path.with_suffix(f"{registry_path.suffix}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb', buffering=1 << 20) as f:
+        f.write(data)
+    os.replace(tmp_path, registry_path)
+    return digest
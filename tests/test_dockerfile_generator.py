@@ -0,0 +1,133 @@
+"""
+Unit tests for the Dockerfile generator
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from itertools import product
+from pathlib import Path
+from unittest.mock import patch
+
+from src.analyzer.workflow_analyzer import WorkflowAnalysis
+from src.generator import dockerfile_generator
+from src.generator.dockerfile_generator import DockerfileGenerator, GenerationConfig
+from src.mapper.model_finder import ModelInfo, ModelLookupResult
+from src.mapper.node_mapper import NodeMappingResult, NodePackInfo
+
+WORKFLOW = Path(__file__).parent.parent / "XiCON" / "XiCON_Dance_SCAIL" / "XiCON_Dance_SCAIL(10s).json"
+
+NODE_REGISTRY = {
+    "node_to_pack": {"WanVideoSamplerv2": "ComfyUI-WanVideoWrapper", "VHS_LoadVideo": "ComfyUI-VideoHelperSuite"},
+    "node_packs": {
+        "ComfyUI-WanVideoWrapper": {
+            "repo": "https://github.com/kijai/ComfyUI-WanVideoWrapper",
+            "install_method": "git_clone",
+            "install_command": "git clone https://github.com/kijai/ComfyUI-WanVideoWrapper",
+            "has_requirements": True,
+            "nodes": ["WanVideoSamplerv2"],
+        },
+        "ComfyUI-VideoHelperSuite": {
+            "repo": "https://github.com/Kosinkadink/ComfyUI-VideoHelperSuite",
+            "install_method": "comfy_cli",
+            "install_command": "comfy node install comfyui-videohelpersuite",
+            "nodes": ["VHS_LoadVideo"],
+        },
+    },
+    "builtin_nodes": {"nodes": ["LoadImage"]},
+}
+
+MODEL_REGISTRY = {
+    "models": {
+        "Wan2.1_VAE.pth": {
+            "url": "https://huggingface.co/Wan-AI/Wan2.1-T2V-1.3B/resolve/main/Wan2.1_VAE.pth",
+            "relative_path": "models/vae",
+            "size_gb": 0.25,
+            "source": "huggingface",
+        },
+        "yolov10m.onnx": {
+            "url": "https://github.com/x/y/releases/download/v1/yolov10m.onnx",
+            "relative_path": "models/onnx",
+            "size_gb": 0.06,
+            "source": "github",
+        },
+    }
+}
+
+
+@unittest.skipIf(dockerfile_generator.jinja2 is None, "jinja2 is not installed")
+class TestTemplateRendering(unittest.TestCase):
+    """Test the Jinja2 templates render the same output as the built-in renderer"""
+
+    def setUp(self):
+        """Write small registries to a temporary directory"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        for target in ("src.mapper.registry_cache.CACHE_DIR", "src.analyzer.workflow_analyzer.CACHE_DIR"):
+            patcher = patch(target, Path(self.tmpdir.name) / "cache")
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.node_registry = os.path.join(self.tmpdir.name, "node_registry.json")
+        self.model_registry = os.path.join(self.tmpdir.name, "model_registry.json")
+        for path, registry in ((self.node_registry, NODE_REGISTRY), (self.model_registry, MODEL_REGISTRY)):
+            with open(path, "w") as f:
+                json.dump(registry, f)
+
+        self.generator = DockerfileGenerator(
+            node_registry_path=self.node_registry, model_registry_path=self.model_registry
+        )
+
+    def read_outputs(self, output_dir):
+        """Return {filename: bytes} for a generated output directory"""
+        return {name: (Path(output_dir) / name).read_bytes() for name in sorted(os.listdir(output_dir))}
+
+    def test_generate_with_templates_matches_default(self):
+        """Test generate(use_templates=True) writes byte-identical files"""
+        for one_layer, input_copy in product((True, False), repeat=2):
+            with self.subTest(one_layer_downloads=one_layer, include_input_copy=input_copy):
+                outputs = []
+                for use_templates in (False, True):
+                    output_dir = os.path.join(self.tmpdir.name, f"out-{use_templates}")
+                    config = GenerationConfig(one_layer_downloads=one_layer,
+                                              include_input_copy=input_copy,
+                                              use_templates=use_templates)
+                    with patch.object(dockerfile_generator, "datetime") as mock_datetime:
+                        mock_datetime.now.return_value.strftime.return_value = "2026-01-01 00:00:00"
+                        self.generator.generate(WORKFLOW, output_dir, config)
+                    outputs.append(self.read_outputs(output_dir))
+
+                self.assertIn("Dockerfile", outputs[0])
+                self.assertEqual(outputs[0], outputs[1])
+
+    def test_render_with_templates_matches_builtin(self):
+        """Test both renderers agree with and without nodes, models and media"""
+        pack = NodePackInfo(name="ComfyUI-WanVideoWrapper", repo="https://github.com/kijai/ComfyUI-WanVideoWrapper",
+                            install_method="git_clone",
+                            install_command="git clone https://github.com/kijai/ComfyUI-WanVideoWrapper",
+                            has_requirements=True)
+        model = ModelInfo(filename="Wan2.1_VAE.pth", url="https://huggingface.co/a/b/Wan2.1_VAE.pth",
+                          relative_path="models/vae", size_gb=0.25)
+
+        for packs, unresolved_nodes, models, unresolved_models, media in product(
+            ([], [pack]), ([], ["MissingNode"]), ({}, {model.filename: model}), ([], ["missing.safetensors"]),
+            ((False, False, False, False), (True, False, False, True)),
+        ):
+            analysis = WorkflowAnalysis(
+                workflow_path="wf.json", nodes=[], node_types=set(), models=set(),
+                has_video_input=media[0], has_video_output=media[1],
+                has_image_input=media[2], has_image_output=media[3], input_files=[],
+            )
+            node_result = NodeMappingResult(resolved={}, unresolved=unresolved_nodes, builtin=[],
+                                            required_packs=packs)
+            model_result = ModelLookupResult(resolved=models, unresolved=unresolved_models,
+                                             total_size_gb=sum(m.size_gb for m in models.values()))
+            args = (analysis, node_result, model_result, GenerationConfig(), "wf", "2026-01-01 00:00:00")
+            with self.subTest(packs=bool(packs), unresolved_nodes=bool(unresolved_nodes), models=bool(models),
+                              unresolved_models=bool(unresolved_models), media=media):
+                self.assertEqual(self.generator._render_templates(*args), self.generator._render_builtin(*args))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+Unit tests for the model finder
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from src.mapper.model_finder import ModelFinder
+from src.mapper.registry_cache import clear_registry_cache
+
+HF = "https://huggingface.co"
+
+
+class TestModelFinder(unittest.TestCase):
+    """Test cases for ModelFinder.lookup"""
+
+    def setUp(self):
+        """Write a registry whose download URLs share a basename"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_dir = patch("src.mapper.registry_cache.CACHE_DIR", Path(self.tmpdir.name) / "cache")
+        self.cache_dir.start()
+        self.registry_path = os.path.join(self.tmpdir.name, "model_registry.json")
+        registry = {
+            "models": {
+                "wan_unet.safetensors": {
+                    "url": f"{HF}/A/repo1/resolve/main/transformer/diffusion_pytorch_model.safetensors",
+                    "relative_path": "models/diffusion_models",
+                    "size_gb": 1.0,
+                },
+                "flux_unet.safetensors": {
+                    "url": f"{HF}/B/repo2/resolve/main/transformer/diffusion_pytorch_model.safetensors",
+                    "relative_path": "models/unet",
+                    "size_gb": 2.0,
+                },
+            }
+        }
+        with open(self.registry_path, "w") as f:
+            json.dump(registry, f)
+        clear_registry_cache()
+
+    def tearDown(self):
+        """Remove the temporary registry"""
+        clear_registry_cache()
+        self.cache_dir.stop()
+        self.tmpdir.cleanup()
+
+    def test_lookup_url_with_shared_basename(self):
+        """Test URLs sharing a basename resolve to their own registry entries"""
+        finder = ModelFinder(self.registry_path)
+
+        for url, expected in (
+            (f"{HF}/A/repo1/resolve/main/transformer/diffusion_pytorch_model.safetensors",
+             "wan_unet.safetensors"),
+            (f"{HF}/B/repo2/resolve/main/transformer/diffusion_pytorch_model.safetensors?download=true",
+             "flux_unet.safetensors"),
+        ):
+            result = finder.lookup([url])
+            self.assertEqual(list(result.resolved), [expected])
+
+    def test_lookup_unregistered_url_with_shared_basename(self):
+        """Test an unregistered URL is not matched on its basename alone"""
+        finder = ModelFinder(self.registry_path)
+
+        result = finder.lookup([f"{HF}/C/repo3/resolve/main/diffusion_pytorch_model.safetensors"])
+
+        self.assertEqual(result.resolved, {})
+        self.assertEqual(result.unresolved, ["diffusion_pytorch_model.safetensors"])
+
+    def test_add_model_indexes_full_url(self):
+        """Test add_model keeps colliding basenames apart"""
+        finder = ModelFinder(self.registry_path)
+        url = f"{HF}/D/repo4/resolve/main/diffusion_pytorch_model.safetensors"
+
+        finder.add_model("other_unet.safetensors", url, save=False)
+
+        self.assertEqual(list(finder.lookup([url]).resolved), ["other_unet.safetensors"])
+        wan_url = f"{HF}/A/repo1/resolve/main/transformer/diffusion_pytorch_model.safetensors"
+        self.assertEqual(list(finder.lookup([wan_url]).resolved), ["wan_unet.safetensors"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+"""
+Unit tests for the workflow analyzer
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from src.analyzer.workflow_analyzer import WorkflowAnalyzer
+
+WORKFLOW = Path(__file__).parent.parent / "XiCON" / "XiCON_Dance_SCAIL" / "XiCON_Dance_SCAIL(10s).json"
+
+
+class TestWorkflowAnalyzer(unittest.TestCase):
+    """Test cases for WorkflowAnalyzer.analyze"""
+
+    def setUp(self):
+        """Keep the on-disk analysis cache in a temporary directory"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        patcher = patch("src.analyzer.workflow_analyzer.CACHE_DIR", Path(self.tmpdir.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def test_analyze_returns_independent_results(self):
+        """Test mutating one cached analysis does not affect the next"""
+        first = WorkflowAnalyzer.DEFAULT.analyze(WORKFLOW)
+        models = len(first.models)
+        node_types = list(first.unique_node_types)
+
+        first.models.clear()
+        first.unique_node_types.clear()
+        second = WorkflowAnalyzer.DEFAULT.analyze(WORKFLOW)
+
+        self.assertIsNot(first, second)
+        self.assertEqual(len(second.models), models)
+        self.assertEqual(second.unique_node_types, node_types)
+        self.assertGreater(models, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -20,7 +20,9 @@ from pathlib import Path
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from src.cli.commands import main
-
 if __name__ == "__main__":
+    # Imported here so importing this script stays cheap; each command
+    # imports the analyzer/mapper/generator modules it needs on its own
+    from src.cli.commands import main
+
     main()